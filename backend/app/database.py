@@ -57,6 +57,12 @@ def _run_migrations():
                 conn.execute(text(f"ALTER TABLE stories ADD COLUMN {column_name} {column_def}"))
                 conn.commit()
 
+        # Composite index for per-story episode lookups (create_all skips existing tables)
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_episodes_story_id_number ON episodes (story_id, number)"
+        ))
+        conn.commit()
+
 
 def init_db():
     """Initialize database tables."""
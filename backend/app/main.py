@@ -1,3 +1,5 @@
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
@@ -20,6 +22,8 @@ from app.models.tts_provider import TTSProvider, TTSProviderType
 from app.models.speed_button import SpeedButton
 from app.services.llm_service import llm_service, ProviderManager
 from app.services.tts.unified import unified_tts_service
+from app.services.tts.manager import TTSProviderManager
+from app.services.tts_service import tts_service
 
 settings = get_settings()
 
@@ -137,12 +141,33 @@ def init_default_providers():
         db.close()
 
 
+async def warm_tts_connection():
+    """Open a pooled connection to the default TTS provider before it's needed."""
+    db = SessionLocal()
+    try:
+        provider = TTSProviderManager.get_default_provider(db)
+    finally:
+        db.close()
+    await unified_tts_service.health_check(provider)
+
+
 @app.on_event("startup")
 async def startup():
     """Initialize database on startup."""
     init_db()
     init_default_providers()
     init_default_speed_buttons()
+    # Runs in the background so an offline TTS server never delays startup
+    app.state.tts_warmup = asyncio.create_task(warm_tts_connection())
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Close shared HTTP clients on shutdown."""
+    app.state.tts_warmup.cancel()
+    await llm_service.aclose()
+    await unified_tts_service.aclose()
+    await tts_service.aclose()
 
 
 @app.get("/api/health")
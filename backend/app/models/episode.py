@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -9,6 +9,10 @@ class Episode(Base):
     """Episode model representing a single installment of a story."""
 
     __tablename__ = "episodes"
+    __table_args__ = (
+        # Episodes are looked up and numbered per story
+        Index("ix_episodes_story_id_number", "story_id", "number"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     story_id = Column(Integer, ForeignKey("stories.id"), nullable=False)
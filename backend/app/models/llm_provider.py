@@ -12,6 +12,14 @@ class ProviderType(str, enum.Enum):
     KOBOLDCPP = "koboldcpp"
 
 
+def build_api_url(base_url: str, path: str) -> str:
+    """Build an OpenAI-compatible API URL, adding the /v1 prefix when missing."""
+    base_url = base_url.rstrip('/')
+    if base_url.endswith('/v1'):
+        return f"{base_url}/{path}"
+    return f"{base_url}/v1/{path}"
+
+
 class LLMProvider(Base):
     """LLM provider configuration model."""
 
@@ -28,5 +36,16 @@ class LLMProvider(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # Built on each access so edits to base_url take effect immediately
+    @property
+    def chat_endpoint(self) -> str:
+        """Chat completions endpoint for this provider."""
+        return build_api_url(self.base_url, "chat/completions")
+
+    @property
+    def models_endpoint(self) -> str:
+        """Models listing endpoint for this provider."""
+        return build_api_url(self.base_url, "models")
+
     def __repr__(self):
         return f"<LLMProvider(id={self.id}, name='{self.name}', type='{self.provider_type}')>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, Text, DateTime, ForeignKey, JSON
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -20,8 +20,8 @@ class MemoryState(Base):
     faded_memory = Column(Text, nullable=True)  # High-level facts from older episodes
 
     # State tracking
-    character_states = Column(Text, nullable=True)  # JSON: current state of each character
-    plot_threads = Column(Text, nullable=True)  # JSON: active plot threads
+    character_states = Column(JSON, nullable=True)  # Current state of each character
+    plot_threads = Column(JSON, nullable=True)  # Active plot threads
 
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
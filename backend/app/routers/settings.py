@@ -173,13 +173,11 @@ async def test_provider_url(
     """Test connection to a provider URL without saving it."""
     from app.models.llm_provider import ProviderType
 
-    # Create a temporary provider object for testing
-    class TempProvider:
-        def __init__(self, url):
-            self.base_url = url
-            self.provider_type = ProviderType.OLLAMA  # Type doesn't matter for URL test
-
-    temp = TempProvider(base_url)
+    # Create a transient (unsaved) provider object for testing
+    temp = LLMProvider(
+        base_url=base_url,
+        provider_type=ProviderType.OLLAMA,  # Type doesn't matter for URL test
+    )
 
     try:
         is_healthy = await llm_service.health_check(temp)
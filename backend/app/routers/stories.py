@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from app.database import get_db
@@ -20,7 +21,9 @@ router = APIRouter(prefix="/api/stories", tags=["stories"])
 
 def _story_to_response(db: Session, story: Story) -> dict:
     """Convert story model to response dict."""
-    episode_count = db.query(Episode).filter(Episode.story_id == story.id).count()
+    episode_count = (
+        db.query(func.count(Episode.id)).filter(Episode.story_id == story.id).scalar()
+    )
     characters = []
     for sc in story.story_characters:
         characters.append(
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException, Depends
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+from contextlib import aclosing
 from typing import Optional
 
 from app.database import get_db
@@ -91,14 +92,15 @@ async def stream_tts(
                 raise HTTPException(status_code=404, detail="Voice clone not found")
 
         async def audio_stream():
-            async for chunk in unified_tts_service.generate_stream(
+            async with aclosing(unified_tts_service.generate_stream(
                 text=request.text,
                 voice=request.voice,
                 speed=request.speed or 1.0,
                 provider=provider,
                 voice_clone=voice_clone,
-            ):
-                yield chunk
+            )) as chunks:
+                async for chunk in chunks:
+                    yield chunk
 
         # Both Kokoro and Chatterbox stream MP3 via OpenAI-compatible endpoints
         # Chatterbox's generate_stream uses /v1/audio/speech with response_format="mp3"
@@ -82,9 +82,6 @@ def create_tts_provider(
     db.commit()
     db.refresh(db_provider)
 
-    # Clear provider cache
-    unified_tts_service.clear_cache()
-
     return db_provider
 
 
@@ -101,7 +98,7 @@ def get_tts_provider(
 
 
 @router.put("/{provider_id}", response_model=TTSProviderResponse)
-def update_tts_provider(
+async def update_tts_provider(
     provider_id: int,
     provider_update: TTSProviderUpdate,
     db: Session = Depends(get_db),
@@ -127,13 +124,13 @@ def update_tts_provider(
     db.refresh(provider)
 
     # Clear provider cache for this provider
-    unified_tts_service.clear_cache(provider_id)
+    await unified_tts_service.clear_cache(provider_id)
 
     return provider
 
 
 @router.delete("/{provider_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_tts_provider(
+async def delete_tts_provider(
     provider_id: int,
     db: Session = Depends(get_db),
 ):
@@ -153,7 +150,7 @@ def delete_tts_provider(
     db.commit()
 
     # Clear provider cache
-    unified_tts_service.clear_cache(provider_id)
+    await unified_tts_service.clear_cache(provider_id)
 
 
 @router.post("/{provider_id}/test", response_model=TTSProviderTestResult)
@@ -166,6 +163,9 @@ async def test_tts_provider(
     if not provider:
         raise HTTPException(status_code=404, detail="TTS provider not found")
 
+    # An explicit test should always reach the server
+    unified_tts_service.invalidate_cache(provider)
+
     try:
         is_healthy = await unified_tts_service.health_check(provider)
         if is_healthy:
@@ -263,6 +263,8 @@ async def test_tts_provider_url(
             status="error",
             message=str(e)
         )
+    finally:
+        await temp_provider.aclose()
 
 
 # Voice Clone Endpoints
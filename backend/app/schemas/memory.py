@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Any
 
 
 class MemoryStateBase(BaseModel):
@@ -8,8 +8,8 @@ class MemoryStateBase(BaseModel):
     active_memory: Optional[str] = None
     background_memory: Optional[str] = None
     faded_memory: Optional[str] = None
-    character_states: Optional[str] = None
-    plot_threads: Optional[str] = None
+    character_states: Optional[list[dict[str, Any]]] = None
+    plot_threads: Optional[list[Any]] = None
 
 
 class MemoryStateCreate(MemoryStateBase):
@@ -23,8 +23,8 @@ class MemoryStateUpdate(BaseModel):
     active_memory: Optional[str] = None
     background_memory: Optional[str] = None
     faded_memory: Optional[str] = None
-    character_states: Optional[str] = None
-    plot_threads: Optional[str] = None
+    character_states: Optional[list[dict[str, Any]]] = None
+    plot_threads: Optional[list[Any]] = None
 
 
 class MemoryStateResponse(MemoryStateBase):
@@ -1,20 +1,75 @@
+import asyncio
 import httpx
 import json
+import time
+from contextlib import suppress
 from typing import AsyncGenerator, Optional
 from sqlalchemy.orm import Session
 from app.config import get_settings
-from app.models.llm_provider import LLMProvider, ProviderType
+from app.models.llm_provider import LLMProvider, build_api_url
 
 settings = get_settings()
 
+# Maximum number of content chunks read ahead of the consumer while streaming
+STREAM_QUEUE_SIZE = 64
+
+# Maximum number of queued content chunks joined into a single yield
+COALESCE_MAX_CHUNKS = 16
+
+# Seconds a successful provider health check is reused
+HEALTH_CHECK_TTL = 10.0
+
+# Request SSE framing and an uncompressed body so chunks are parsed as they arrive
+STREAM_HEADERS = {"Accept": "text/event-stream", "Accept-Encoding": "identity"}
+
+# Marks the end of a streamed completion in the read-ahead queue
+_STREAM_END = object()
+
+# First characters of stream lines that carry no payload (blank line, SSE comment)
+_SKIPPED_LINE_PREFIXES = frozenset(("", ":"))
+
+
+def _extract_content(data: dict) -> Optional[str]:
+    """Extract the text content from a streamed completion chunk."""
+    if "choices" in data and len(data["choices"]) > 0:
+        choice = data["choices"][0]
+        # Try delta first (streaming format)
+        delta = choice.get("delta", {})
+        if "content" in delta:
+            return delta["content"]
+        # Fallback to message format (some providers use this)
+        if "message" in choice and "content" in choice["message"]:
+            return choice["message"]["content"]
+    # Also handle message format (Ollama native)
+    elif "message" in data and "content" in data["message"]:
+        return data["message"]["content"]
+    return None
+
 
 class UnifiedLLMService:
     """Unified LLM service supporting multiple OpenAI-compatible providers."""
 
     def __init__(self):
         # Fallback settings when no database provider is configured
-        self._fallback_base_url = settings.ollama_base_url
         self._fallback_model = settings.ollama_model
+        self._fallback_chat_endpoint = build_api_url(settings.ollama_base_url, "chat/completions")
+        self._fallback_models_endpoint = build_api_url(settings.ollama_base_url, "models")
+        # Shared HTTP client so provider connections are pooled across requests
+        self._client: Optional[httpx.AsyncClient] = None
+        # Monotonic time of the last successful health check per models endpoint
+        self._health_cache: dict[str, float] = {}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Get the shared HTTP client, creating it on first use."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(timeout=300.0)
+        return self._client
+
+    async def aclose(self):
+        """Close the shared HTTP client."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
     async def generate_stream(
         self,
@@ -24,22 +79,21 @@ class UnifiedLLMService:
         max_tokens: int = 4096,
         provider: Optional[LLMProvider] = None,
         model: Optional[str] = None,
+        coalesce: bool = True,
     ) -> AsyncGenerator[str, None]:
         """
         Generate text from the LLM with streaming.
 
         Uses OpenAI-compatible chat/completions endpoint for all providers.
+        When coalesce is True, chunks that have already arrived are joined
+        (up to COALESCE_MAX_CHUNKS) and yielded as a single string.
         """
         # Determine provider settings
         if provider:
-            base_url = provider.base_url.rstrip('/')
             model_name = model or provider.default_model
-            provider_type = provider.provider_type
         else:
             # Fallback to config settings (legacy Ollama support)
-            base_url = self._fallback_base_url
             model_name = model or self._fallback_model
-            provider_type = ProviderType.OLLAMA
 
         if not model_name:
             raise ValueError("No model specified and no default model configured")
@@ -58,53 +112,76 @@ class UnifiedLLMService:
             "max_tokens": max_tokens,
         }
 
-        # Determine endpoint URL based on provider type
-        endpoint_url = self._get_chat_endpoint(base_url, provider_type)
+        endpoint_url = self._get_chat_endpoint(provider)
 
-        async with httpx.AsyncClient(timeout=300.0) as client:
-            async with client.stream(
+        # Read the HTTP stream in a separate task through a bounded queue so a slow
+        # consumer stops socket reads (TCP back-pressure) instead of buffering the reply
+        queue: asyncio.Queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+        producer = asyncio.create_task(self._read_stream(endpoint_url, payload, queue))
+        pending = None
+        try:
+            while True:
+                if pending is None:
+                    item = await queue.get()
+                else:
+                    item, pending = pending, None
+                if item is _STREAM_END:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                if coalesce and not queue.empty():
+                    # Join chunks that are already waiting into one yield
+                    parts = [item]
+                    while len(parts) < COALESCE_MAX_CHUNKS and not queue.empty():
+                        next_item = queue.get_nowait()
+                        if not isinstance(next_item, str):
+                            pending = next_item
+                            break
+                        parts.append(next_item)
+                    item = "".join(parts)
+                yield item
+        finally:
+            producer.cancel()
+            with suppress(asyncio.CancelledError):
+                await producer
+
+    async def _read_stream(self, endpoint_url: str, payload: dict, queue: asyncio.Queue) -> None:
+        """Stream completion chunks from the provider into a bounded queue.
+
+        Errors are forwarded through the queue so the consumer can re-raise them.
+        """
+        try:
+            async with self._get_client().stream(
                 "POST",
                 endpoint_url,
                 json=payload,
+                headers=STREAM_HEADERS,
             ) as response:
                 response.raise_for_status()
                 async for line in response.aiter_lines():
                     print(f"[DEBUG] Raw line: {line[:300] if line else '(empty)'}")
-                    if line.startswith("data: "):
+                    # Classify on the first character so most lines need a single comparison
+                    first = line[:1]
+                    if first == "d" and line.startswith("data: "):
                         data_str = line[6:]
                         if data_str.strip() == "[DONE]":
                             break
-                        try:
-                            data = json.loads(data_str)
-                            if "choices" in data and len(data["choices"]) > 0:
-                                choice = data["choices"][0]
-                                # Try delta first (streaming format)
-                                delta = choice.get("delta", {})
-                                if "content" in delta:
-                                    yield delta["content"]
-                                # Fallback to message format (some providers use this)
-                                elif "message" in choice and "content" in choice["message"]:
-                                    yield choice["message"]["content"]
-                        except json.JSONDecodeError:
-                            continue
-                    elif line and not line.startswith(":"):
+                    elif first in _SKIPPED_LINE_PREFIXES:
+                        # Blank keep-alive or SSE comment
+                        continue
+                    else:
                         # Handle non-SSE format (some providers use NDJSON)
-                        try:
-                            data = json.loads(line)
-                            if "choices" in data and len(data["choices"]) > 0:
-                                choice = data["choices"][0]
-                                # Try delta first (streaming format)
-                                delta = choice.get("delta", {})
-                                if "content" in delta:
-                                    yield delta["content"]
-                                # Fallback to message format (some providers use this)
-                                elif "message" in choice and "content" in choice["message"]:
-                                    yield choice["message"]["content"]
-                            # Also handle message format (Ollama native)
-                            elif "message" in data and "content" in data["message"]:
-                                yield data["message"]["content"]
-                        except json.JSONDecodeError:
-                            continue
+                        data_str = line
+                    try:
+                        content = _extract_content(json.loads(data_str))
+                    except json.JSONDecodeError:
+                        continue
+                    if content is not None:
+                        await queue.put(content)
+        except Exception as e:
+            await queue.put(e)
+            return
+        await queue.put(_STREAM_END)
 
     async def generate(
         self,
@@ -134,63 +211,73 @@ class UnifiedLLMService:
 
     async def list_models(self, provider: Optional[LLMProvider] = None) -> list[dict]:
         """List available models from a provider."""
-        if provider:
-            base_url = provider.base_url.rstrip('/')
-            provider_type = provider.provider_type
+        models_url = self._get_models_endpoint(provider)
+
+        response = await self._get_client().get(models_url, timeout=30.0)
+        response.raise_for_status()
+        data = response.json()
+
+        # Handle different response formats
+        if "data" in data:
+            # OpenAI format
+            return data["data"]
+        elif "models" in data:
+            # Ollama native format
+            return data["models"]
         else:
-            base_url = self._fallback_base_url
-            provider_type = ProviderType.OLLAMA
-
-        models_url = self._get_models_endpoint(base_url, provider_type)
-
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(models_url)
-            response.raise_for_status()
-            data = response.json()
-
-            # Handle different response formats
-            if "data" in data:
-                # OpenAI format
-                return data["data"]
-            elif "models" in data:
-                # Ollama native format
-                return data["models"]
-            else:
-                return []
+            return []
 
     async def health_check(self, provider: Optional[LLMProvider] = None) -> bool:
-        """Check if a provider is available."""
+        """Check if a provider is available.
+
+        Uses a HEAD request (falling back to GET for servers that reject it) and
+        remembers successful checks per endpoint for HEALTH_CHECK_TTL seconds.
+        Unsaved providers (e.g. from the test-URL route) are always probed and
+        never cached.
+        """
         try:
-            if provider:
-                base_url = provider.base_url.rstrip('/')
-                provider_type = provider.provider_type
-            else:
-                base_url = self._fallback_base_url
-                provider_type = ProviderType.OLLAMA
+            models_url = self._get_models_endpoint(provider)
+            cacheable = provider is None or provider.id is not None
 
-            models_url = self._get_models_endpoint(base_url, provider_type)
+            last_ok = self._health_cache.get(models_url) if cacheable else None
+            if last_ok is not None and time.monotonic() - last_ok < HEALTH_CHECK_TTL:
+                return True
 
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                response = await client.get(models_url)
-                return response.status_code == 200
+            client = self._get_client()
+            response = await client.head(models_url, timeout=5.0, follow_redirects=True)
+            if response.status_code != 200:
+                # Not every provider routes HEAD; confirm with a regular GET
+                response = await client.get(models_url, timeout=5.0)
+
+            if response.status_code == 200:
+                if cacheable:
+                    self._remember_healthy(models_url)
+                return True
+            self._health_cache.pop(models_url, None)
+            return False
         except Exception:
             return False
 
-    def _get_chat_endpoint(self, base_url: str, provider_type: ProviderType) -> str:
+    def _remember_healthy(self, models_url: str) -> None:
+        """Record a successful check, dropping entries that have expired."""
+        now = time.monotonic()
+        for url, last_ok in list(self._health_cache.items()):
+            if now - last_ok >= HEALTH_CHECK_TTL:
+                del self._health_cache[url]
+        self._health_cache[models_url] = now
+
+    def _get_chat_endpoint(self, provider: Optional[LLMProvider]) -> str:
         """Get the chat completions endpoint for a provider."""
         # All providers use OpenAI-compatible endpoints
-        if base_url.endswith('/v1'):
-            return f"{base_url}/chat/completions"
-        else:
-            return f"{base_url}/v1/chat/completions"
+        if provider:
+            return provider.chat_endpoint
+        return self._fallback_chat_endpoint
 
-    def _get_models_endpoint(self, base_url: str, provider_type: ProviderType) -> str:
+    def _get_models_endpoint(self, provider: Optional[LLMProvider]) -> str:
         """Get the models listing endpoint for a provider."""
-        # Try OpenAI-compatible endpoint first
-        if base_url.endswith('/v1'):
-            return f"{base_url}/models"
-        else:
-            return f"{base_url}/v1/models"
+        if provider:
+            return provider.models_endpoint
+        return self._fallback_models_endpoint
 
 
 class ProviderManager:
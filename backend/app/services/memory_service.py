@@ -1,4 +1,3 @@
-import json
 from typing import Optional
 from sqlalchemy.orm import Session
 
@@ -24,10 +23,11 @@ class MemoryService:
         if not story:
             raise ValueError(f"Story {story_id} not found")
 
+        # Chronological order so each tier can be sliced from the end without reversing
         episodes = (
             db.query(Episode)
             .filter(Episode.story_id == story_id)
-            .order_by(Episode.number.desc())
+            .order_by(Episode.number)
             .all()
         )
 
@@ -43,15 +43,16 @@ class MemoryService:
             use_condensed = False
 
         # Build memory tiers with adaptive sizing
+        background_start = -(active_episodes + self.BACKGROUND_MEMORY_EPISODES)
         active_memory = self._build_active_memory(
-            episodes[:active_episodes],
+            episodes[-active_episodes:],
             condensed=use_condensed
         )
         background_memory = self._build_background_memory(
-            episodes[active_episodes:active_episodes + self.BACKGROUND_MEMORY_EPISODES]
+            episodes[background_start:-active_episodes]
         )
         faded_memory = await self._build_faded_memory(
-            db, story_id, episodes[active_episodes + self.BACKGROUND_MEMORY_EPISODES:]
+            db, story_id, episodes[:background_start]
         )
 
         # Get character states
@@ -74,30 +75,28 @@ class MemoryService:
         """Build active memory from recent episodes.
 
         Args:
-            episodes: List of recent episodes
+            episodes: List of recent episodes in chronological order
             condensed: If True, use summary + last paragraphs only (reduces context ~80%)
         """
-        if not episodes:
-            return ""
+        if condensed:
+            return "\n\n".join(
+                f"=== Episode {ep.number}: {ep.title or 'Untitled'} ===\n{self._condense_episode(ep)}"
+                for ep in episodes
+            )
+        return "\n\n".join(
+            f"=== Episode {ep.number}: {ep.title or 'Untitled'} ===\n{ep.content}"
+            for ep in episodes
+        )
 
-        parts = []
-        for ep in reversed(episodes):  # Chronological order
-            if condensed:
-                # Condensed format: summary + last 2 paragraphs only
-                content_parts = []
-                if ep.summary:
-                    content_parts.append(f"Summary: {ep.summary}")
-                ending = self._get_last_paragraphs(ep.content, n=2)
-                if ending:
-                    content_parts.append(f"Ending:\n{ending}")
-                content = "\n\n".join(content_parts)
-            else:
-                # Full format: entire episode text
-                content = ep.content
-
-            parts.append(f"=== Episode {ep.number}: {ep.title or 'Untitled'} ===\n{content}")
-
-        return "\n\n".join(parts)
+    def _condense_episode(self, ep: Episode) -> str:
+        """Condensed format: summary + last 2 paragraphs only."""
+        content_parts = []
+        if ep.summary:
+            content_parts.append(f"Summary: {ep.summary}")
+        ending = self._get_last_paragraphs(ep.content, n=2)
+        if ending:
+            content_parts.append(f"Ending:\n{ending}")
+        return "\n\n".join(content_parts)
 
     def _get_last_paragraphs(self, content: str, n: int = 2) -> str:
         """Extract the last N paragraphs from content."""
@@ -107,16 +106,10 @@ class MemoryService:
         return '\n\n'.join(paragraphs[-n:]) if paragraphs else content
 
     def _build_background_memory(self, episodes: list[Episode]) -> str:
-        """Build background memory from summaries."""
-        if not episodes:
-            return ""
-
-        parts = []
-        for ep in reversed(episodes):  # Chronological order
-            if ep.summary:
-                parts.append(f"Episode {ep.number}: {ep.summary}")
-
-        return "\n".join(parts) if parts else ""
+        """Build background memory from summaries (episodes in chronological order)."""
+        return "\n".join(
+            f"Episode {ep.number}: {ep.summary}" for ep in episodes if ep.summary
+        )
 
     async def _build_faded_memory(
         self, db: Session, story_id: int, episodes: list[Episode]
@@ -137,12 +130,7 @@ class MemoryService:
             return latest_memory.faded_memory
 
         # If no stored faded memory, extract key facts from summaries
-        facts = []
-        for ep in reversed(episodes):
-            if ep.summary:
-                facts.append(f"- {ep.summary}")
-
-        return "\n".join(facts) if facts else ""
+        return "\n".join(f"- {ep.summary}" for ep in episodes if ep.summary)
 
     def _get_character_states(self, db: Session, story: Story) -> list[dict]:
         """Get current state of all characters in the story."""
@@ -205,12 +193,11 @@ Summary:"""
             active_memory=context.get("active_memory", ""),
             background_memory=context.get("background_memory", ""),
             faded_memory=context.get("faded_memory", ""),
-            character_states=json.dumps(context.get("characters", [])),
-            plot_threads=json.dumps(context.get("plot_threads", [])),
+            character_states=context.get("characters", []),
+            plot_threads=context.get("plot_threads", []),
         )
         db.add(memory_state)
         db.commit()
-        db.refresh(memory_state)
         return memory_state
 
 
@@ -1,3 +1,5 @@
+from functools import lru_cache
+from string import Template
 from typing import Optional
 
 
@@ -59,55 +61,46 @@ LENGTH_STRUCTURES = {
 }
 
 
-class PromptService:
-    """Service for building prompts for story generation."""
-
-    def build_system_prompt(
-        self,
-        context: dict,
-        writing_style: Optional[str] = None,
-        mood: Optional[str] = None,
-        pacing: Optional[str] = None,
-    ) -> str:
-        """Build the system prompt for story generation.
+def _build_length_requirements(target_words: int, word_preset: str) -> str:
+    """Build the length requirements section for a target word count and preset."""
+    # Get structural constraints for this length preset
+    structure = LENGTH_STRUCTURES.get(word_preset, LENGTH_STRUCTURES["medium"])
+    max_words = int(target_words * 1.2)
 
-        Args:
-            context: Story context including scenario and characters
-            writing_style: Writing style setting (descriptive, action, dialogue, balanced)
-            mood: Mood setting (light, moderate, intense, dark)
-            pacing: Pacing setting (slow, moderate, fast)
-        """
-        scenario = context["scenario"]
-        characters = context["characters"]
+    return f"""## Length Requirements (CRITICAL)
+- Target: approximately {target_words} words ({word_preset} episode)
+- Structure: {structure['scenes']} scenes, {structure['paragraphs']} paragraphs
+- {structure['instruction']}
+- STOP when you reach a natural conclusion near the target length
+- Do NOT exceed {max_words} words"""
 
-        # Build character descriptions
-        char_descriptions = []
-        for char in characters:
-            desc = f"- {char['name']} ({char['role']}): {char.get('description', 'No description')}"
-            if char.get('personality'):
-                desc += f"\n  Personality: {char['personality']}"
-            if char.get('motivations'):
-                desc += f"\n  Motivations: {char['motivations']}"
-            char_descriptions.append(desc)
 
-        characters_text = "\n".join(char_descriptions) if char_descriptions else "No characters defined."
+# Length requirements for each preset at its default word target
+_LENGTH_REQUIREMENTS_CACHE = {
+    (words, preset): _build_length_requirements(words, preset)
+    for preset, words in WORD_PRESETS.items()
+}
 
-        system_prompt = f"""You are a skilled fiction writer crafting an episodic story. Your task is to write engaging, immersive narrative prose.
+# Scenario fields rendered into the system prompt, with their fallback text
+SCENARIO_PROMPT_FIELDS = (
+    ("name", "Untitled"),
+    ("setting", "Not specified"),
+    ("time_period", "Not specified"),
+    ("genre", "General fiction"),
+    ("tone", "Neutral"),
+    ("premise", "Not specified"),
+    ("themes", "Not specified"),
+    ("world_rules", "Standard reality"),
+)
+
+# System prompt skeleton, parsed once at import; only the placeholders vary per call
+SYSTEM_PROMPT_TEMPLATE = Template("""You are a skilled fiction writer crafting an episodic story. Your task is to write engaging, immersive narrative prose.
 
 ## Story Setting
-**Title**: {scenario.get('name', 'Untitled')}
-**Setting**: {scenario.get('setting', 'Not specified')}
-**Time Period**: {scenario.get('time_period', 'Not specified')}
-**Genre**: {scenario.get('genre', 'General fiction')}
-**Tone**: {scenario.get('tone', 'Neutral')}
-**Premise**: {scenario.get('premise', 'Not specified')}
-**Themes**: {scenario.get('themes', 'Not specified')}
-
-## World Rules
-{scenario.get('world_rules', 'Standard reality')}
+${scenario_block}
 
 ## Characters
-{characters_text}
+${characters_text}
 
 ## Writing Guidelines
 1. Write in third person past tense
@@ -121,51 +114,132 @@ class PromptService:
 ## Variation Guidelines
 8. Vary sentence structures - mix short punchy sentences with longer flowing ones
 9. Use fresh metaphors and descriptions - avoid repeating imagery from previous episodes
-10. Find new ways to describe recurring elements (settings, character traits, emotions)"""
-
-        # Add style configuration if any non-default settings are provided
-        style_section = self._build_style_section(writing_style, mood, pacing)
-        if style_section:
-            system_prompt += f"\n\n{style_section}"
-
-        system_prompt += """
+10. Find new ways to describe recurring elements (settings, character traits, emotions)${style_section}
 
 ## Important
 - Stay true to character personalities and motivations
 - Respect established world rules and setting details
 - Build on events from previous episodes
-- Create engaging narrative tension"""
+- Create engaging narrative tension""")
+
 
-        return system_prompt
+def _render_scenario_block(
+    name, setting, time_period, genre, tone, premise, themes, world_rules
+) -> str:
+    """Render the story setting and world rules section for a scenario."""
+    return f"""**Title**: {name}
+**Setting**: {setting}
+**Time Period**: {time_period}
+**Genre**: {genre}
+**Tone**: {tone}
+**Premise**: {premise}
+**Themes**: {themes}
+
+## World Rules
+{world_rules}"""
+
+
+def _format_character(name, role, description, personality, motivations) -> str:
+    """Format a single character entry for the system prompt."""
+    return (
+        f"- {name} ({role}): {description}"
+        + (f"\n  Personality: {personality}" if personality else "")
+        + (f"\n  Motivations: {motivations}" if motivations else "")
+    )
+
+
+def _build_style_section(
+    writing_style: Optional[str] = None,
+    mood: Optional[str] = None,
+    pacing: Optional[str] = None,
+) -> str:
+    """Build the style configuration section for the prompt."""
+    parts = []
+
+    # Only include non-default settings
+    if writing_style and writing_style != "balanced":
+        instruction = STYLE_INSTRUCTIONS.get(writing_style, "")
+        if instruction:
+            parts.append(f"**Writing Style**: {instruction}")
+
+    if mood and mood != "moderate":
+        instruction = MOOD_INSTRUCTIONS.get(mood, "")
+        if instruction:
+            parts.append(f"**Mood**: {instruction}")
+
+    if pacing and pacing != "moderate":
+        instruction = PACING_INSTRUCTIONS.get(pacing, "")
+        if instruction:
+            parts.append(f"**Pacing**: {instruction}")
+
+    if parts:
+        return "## Story Style Configuration\n\n" + "\n".join(parts)
+    return ""
+
+
+@lru_cache(maxsize=256)
+def _render_system_prompt(
+    scenario_fields: tuple,
+    characters: tuple,
+    writing_style: Optional[str],
+    mood: Optional[str],
+    pacing: Optional[str],
+) -> str:
+    """Render the system prompt from hashable scenario and character fields."""
+    # Build character descriptions
+    characters_text = (
+        "\n".join(_format_character(*char) for char in characters)
+        or "No characters defined."
+    )
+
+    # Add style configuration if any non-default settings are provided
+    style_section = _build_style_section(writing_style, mood, pacing)
+
+    return SYSTEM_PROMPT_TEMPLATE.substitute(
+        scenario_block=_render_scenario_block(*scenario_fields),
+        characters_text=characters_text,
+        style_section=f"\n\n{style_section}" if style_section else "",
+    )
 
-    def _build_style_section(
+
+class PromptService:
+    """Service for building prompts for story generation."""
+
+    def build_system_prompt(
         self,
+        context: dict,
         writing_style: Optional[str] = None,
         mood: Optional[str] = None,
         pacing: Optional[str] = None,
     ) -> str:
-        """Build the style configuration section for the prompt."""
-        parts = []
-
-        # Only include non-default settings
-        if writing_style and writing_style != "balanced":
-            instruction = STYLE_INSTRUCTIONS.get(writing_style, "")
-            if instruction:
-                parts.append(f"**Writing Style**: {instruction}")
-
-        if mood and mood != "moderate":
-            instruction = MOOD_INSTRUCTIONS.get(mood, "")
-            if instruction:
-                parts.append(f"**Mood**: {instruction}")
+        """Build the system prompt for story generation.
 
-        if pacing and pacing != "moderate":
-            instruction = PACING_INSTRUCTIONS.get(pacing, "")
-            if instruction:
-                parts.append(f"**Pacing**: {instruction}")
+        The rendered prompt is cached on its inputs, so episodes of the same story
+        reuse it until the scenario, characters or style settings change.
 
-        if parts:
-            return "## Story Style Configuration\n\n" + "\n".join(parts)
-        return ""
+        Args:
+            context: Story context including scenario and characters
+            writing_style: Writing style setting (descriptive, action, dialogue, balanced)
+            mood: Mood setting (light, moderate, intense, dark)
+            pacing: Pacing setting (slow, moderate, fast)
+        """
+        scenario = context["scenario"]
+        return _render_system_prompt(
+            tuple(scenario.get(field, default) for field, default in SCENARIO_PROMPT_FIELDS),
+            tuple(
+                (
+                    char['name'],
+                    char['role'],
+                    char.get('description', 'No description'),
+                    char.get('personality'),
+                    char.get('motivations'),
+                )
+                for char in context["characters"]
+            ),
+            writing_style,
+            mood,
+            pacing,
+        )
 
     def build_generation_prompt(
         self,
@@ -178,17 +252,10 @@ class PromptService:
         episode_number = context["next_episode_number"]
         is_first_episode = episode_number == 1
 
-        # Get structural constraints for this length preset
-        structure = LENGTH_STRUCTURES.get(word_preset, LENGTH_STRUCTURES["medium"])
-        max_words = int(target_words * 1.2)
-
-        # Build length requirements section
-        length_requirements = f"""## Length Requirements (CRITICAL)
-- Target: approximately {target_words} words ({word_preset} episode)
-- Structure: {structure['scenes']} scenes, {structure['paragraphs']} paragraphs
-- {structure['instruction']}
-- STOP when you reach a natural conclusion near the target length
-- Do NOT exceed {max_words} words"""
+        # Build length requirements section (preset defaults are prebuilt at import)
+        length_requirements = _LENGTH_REQUIREMENTS_CACHE.get(
+            (target_words, word_preset)
+        ) or _build_length_requirements(target_words, word_preset)
 
         # Build memory context
         memory_parts = []
@@ -1,8 +1,10 @@
+import asyncio
 import re
 from typing import AsyncGenerator, Optional
+from sqlalchemy import func, insert, literal, select
 from sqlalchemy.orm import Session
 
-from app.models import Story, Episode, StoryCharacter, MemoryState
+from app.models import Story, Episode, StoryCharacter, MemoryState, LLMProvider
 from app.models.story import StoryStatus
 from app.services.llm_service import llm_service, ProviderManager
 from app.services.memory_service import memory_service
@@ -11,6 +13,36 @@ from app.config import get_settings
 
 settings = get_settings()
 
+# Sentence boundary: terminal punctuation, optional closing quotes/brackets, trailing space
+_SENTENCE_ENDINGS = re.compile(r'[.!?]["\')\]]*\s*')
+
+# Title cleanup: first quoted string, "Here are..." preamble, leading "1. " numbering
+_TITLE_QUOTED = re.compile(r'["\']([^"\']+)["\']')
+_TITLE_PREAMBLE = re.compile(r'^(?:Here (?:are|is)[^\n]*:?\s*)', re.IGNORECASE)
+_TITLE_NUMBERING = re.compile(r'^\d+\.\s*')
+
+# Content ending: closing punctuation, optionally followed by a closing quote
+_ENDS_WITH_PUNCTUATION = re.compile(r'[.!?]["\']?$')
+
+
+def _last_sentence_end(text: str) -> int:
+    """Return the end index of the last complete sentence in text, or 0 if none.
+
+    Scans backwards from the end, so only the tail after the last sentence is
+    visited. A sentence ends at '.', '!' or '?', optionally followed by a closing
+    quote, when followed by whitespace or the end of the text.
+    """
+    length = len(text)
+    for i in range(length - 1, -1, -1):
+        if text[i] not in ".!?":
+            continue
+        end = i + 1
+        if end < length and text[end] in "\"'" and (end + 1 == length or text[end + 1].isspace()):
+            return end + 1
+        if end == length or text[end].isspace():
+            return end
+    return 0
+
 
 class StoryService:
     """Service for story orchestration and episode generation."""
@@ -34,9 +66,13 @@ class StoryService:
             story.status = StoryStatus.IN_PROGRESS
             db.commit()
 
-        # Get episode count and create new episode
-        episode_count = db.query(Episode).filter(Episode.story_id == story_id).count()
-        episode_number = episode_count + 1
+        # Number the new episode after the story's latest one
+        episode_number = (
+            db.query(func.coalesce(func.max(Episode.number), 0))
+            .filter(Episode.story_id == story_id)
+            .scalar()
+            + 1
+        )
 
         new_episode = Episode(
             story_id=story_id,
@@ -44,10 +80,12 @@ class StoryService:
             guidance=guidance,
         )
         db.add(new_episode)
+        db.flush()
+        # Read the ID before commit expires the instance, so it is never reloaded
+        episode_id = new_episode.id
         db.commit()
-        db.refresh(new_episode)
 
-        yield {"event": "start", "data": str(new_episode.id), "episode_id": new_episode.id}
+        yield {"event": "start", "data": str(episode_id), "episode_id": episode_id}
 
         try:
             # Get story generation settings
@@ -87,81 +125,107 @@ class StoryService:
             max_tokens = self._calculate_max_tokens(effective_target_words)
 
             # Stream generation with story temperature and token limit
-            full_content = ""
-            current_sentence = ""
-            sentence_endings = re.compile(r'[.!?]["\')\]]*\s*')
+            # Tokens are collected in a list and joined once to avoid quadratic concatenation
+            content_parts: list[str] = []
 
-            async for token in llm_service.generate_stream(
+            token_stream = llm_service.generate_stream(
                 prompt=user_prompt,
                 system_prompt=system_prompt,
                 provider=provider,
                 temperature=story_settings["temperature"],
                 max_tokens=max_tokens,
-            ):
-                full_content += token
-                current_sentence += token
-
-                # Emit token event
-                yield {"event": "token", "data": token, "episode_id": new_episode.id}
-
-                # Check for sentence completion (for TTS)
-                if sentence_endings.search(current_sentence):
-                    sentences = sentence_endings.split(current_sentence)
-                    for sentence in sentences[:-1]:
-                        if sentence.strip():
-                            yield {
-                                "event": "sentence",
-                                "data": sentence.strip(),
-                                "episode_id": new_episode.id,
-                            }
-                    current_sentence = sentences[-1] if sentences else ""
-
-            # Emit any remaining sentence
-            if current_sentence.strip():
-                yield {
-                    "event": "sentence",
-                    "data": current_sentence.strip(),
-                    "episode_id": new_episode.id,
-                }
+            )
+            async for event, data in self._split_sentences(token_stream):
+                if event == "token":
+                    content_parts.append(data)
+                yield {"event": event, "data": data, "episode_id": episode_id}
 
-            # Update episode with cleaned content
-            new_episode.content = self._clean_content(full_content)
-            new_episode.word_count = len(new_episode.content.split())
+            full_content = "".join(content_parts)
 
-            # Generate title and summary
-            title = await self._generate_title(full_content, db, use_alternate)
-            summary = await memory_service.generate_summary(full_content, provider)
+            # Update episode with cleaned content
+            content = self._clean_content(full_content)
+            word_count = len(content.split())
+            new_episode.content = content
+            new_episode.word_count = word_count
+
+            # Generate title and summary concurrently; they are independent LLM calls
+            title, summary = await asyncio.gather(
+                self._generate_title(full_content, provider, db, use_alternate),
+                memory_service.generate_summary(full_content, provider),
+            )
 
             new_episode.title = title
             new_episode.summary = summary
 
             db.commit()
-            db.refresh(new_episode)
 
             # Save memory state
-            await memory_service.save_memory_state(db, story_id, new_episode.id, context)
+            await memory_service.save_memory_state(db, story_id, episode_id, context)
 
             yield {
                 "event": "complete",
                 "data": {
-                    "episode_id": new_episode.id,
+                    "episode_id": episode_id,
                     "title": title,
-                    "word_count": new_episode.word_count,
+                    "word_count": word_count,
                 },
             }
 
         except Exception as e:
-            yield {"event": "error", "data": str(e), "episode_id": new_episode.id}
+            yield {"event": "error", "data": str(e), "episode_id": episode_id}
             # Clean up failed episode
             db.delete(new_episode)
             db.commit()
 
-    async def _generate_title(self, content: str, db: Session, use_alternate: bool = False) -> str:
-        """Generate a title for the episode with fallback to alternate provider."""
+    async def _split_sentences(
+        self, tokens: AsyncGenerator[str, None]
+    ) -> AsyncGenerator[tuple[str, str], None]:
+        """Pass tokens through, interleaving ("sentence", text) events for TTS.
+
+        Yields ("token", token) for every token, followed by any sentences that
+        token completed, and finally the unterminated tail once the stream ends.
+        """
+        sentence_parts: list[str] = []
+
+        async for token in tokens:
+            sentence_parts.append(token)
+            yield "token", token
+
+            # The buffered text never holds terminal punctuation, so only tokens
+            # containing it can end a sentence and only the new token needs scanning.
+            if "." in token or "!" in token or "?" in token:
+                pending = "".join(sentence_parts)
+                start = 0
+                for match in _SENTENCE_ENDINGS.finditer(pending, len(pending) - len(token)):
+                    sentence = pending[start:match.start()].strip()
+                    if sentence:
+                        yield "sentence", sentence
+                    start = match.end()
+                sentence_parts = [pending[start:]]
+
+        # Emit any remaining sentence
+        remaining = "".join(sentence_parts).strip()
+        if remaining:
+            yield "sentence", remaining
+
+    async def _generate_title(
+        self,
+        content: str,
+        provider: Optional[LLMProvider],
+        db: Session,
+        use_alternate: bool = False,
+    ) -> str:
+        """Generate a title for the episode with fallback to alternate provider.
+
+        Args:
+            content: Episode content to title
+            provider: Provider already selected for this generation
+            db: Session used to look up the fallback provider, only if needed
+            use_alternate: Whether the primary provider is the alternate one
+        """
         prompt = prompt_service.build_title_prompt(content)
 
         # Try primary provider
-        provider = ProviderManager.get_provider_for_generation(db, use_alternate)
         raw = await llm_service.generate(
             prompt=prompt,
             temperature=0.7,
@@ -188,41 +252,43 @@ class StoryService:
     def _clean_title(self, raw: str) -> str:
         """Extract clean title from LLM response, handling preamble and multiple options."""
         # Extract first quoted string if present (handles "1. "Title" 2. "Other"")
-        quoted = re.search(r'["\']([^"\']+)["\']', raw)
+        quoted = _TITLE_QUOTED.search(raw)
         if quoted:
             return quoted.group(1).strip()[:255]
 
         # Remove common preambles like "Here are some options:"
-        cleaned = re.sub(r'^(?:Here (?:are|is)[^\n]*:?\s*)', '', raw, flags=re.IGNORECASE)
+        cleaned = _TITLE_PREAMBLE.sub('', raw)
         # Remove leading numbered list format "1. "
-        cleaned = re.sub(r'^\d+\.\s*', '', cleaned)
+        cleaned = _TITLE_NUMBERING.sub('', cleaned)
         # Final cleanup
         cleaned = cleaned.strip().strip('"\'')
 
         return cleaned[:255] if cleaned else "Untitled"
 
-    # Patterns to strip from beginning of generated content
+    # Patterns to strip from beginning of generated content, compiled once
     CLEANUP_PATTERNS = [
         # Title with explanation: "Title" This title hints at...
-        (r'^["\'][^"\']+["\'][\s]*(?:This title|This hints|This captures|This reflects)[^\n]*\n*', re.IGNORECASE),
+        re.compile(r'^["\'][^"\']+["\'][\s]*(?:This title|This hints|This captures|This reflects)[^\n]*\n*', re.IGNORECASE),
         # Title suggestions intro + numbered list
-        (r'^Here (?:are|is)[^\n]*(?:title|option)[^\n]*:\s*\n?(?:\d+\.[^\n]*\n)*', re.IGNORECASE),
+        re.compile(r'^Here (?:are|is)[^\n]*(?:title|option)[^\n]*:\s*\n?(?:\d+\.[^\n]*\n)*', re.IGNORECASE),
         # Standalone numbered title lists
-        (r'^(?:\d+\.\s*["\'][^\n]*\n?)+', re.MULTILINE),
-        # Episode headers
-        (r'^\*{0,2}Episode\s+\d+[:\s].*?\*{0,2}\s*\n+', re.IGNORECASE | re.MULTILINE),
-        (r'^#{1,3}\s*Episode\s+\d+.*?\n+', re.IGNORECASE | re.MULTILINE),
+        re.compile(r'^(?:\d+\.\s*["\'][^\n]*\n?)+', re.MULTILINE),
+        # Episode headers, bold ("**Episode 2**") or markdown ("## Episode 2"), in one pass
+        re.compile(
+            r'^(?:\*{0,2}Episode\s+\d+[:\s].*?\*{0,2}\s*|#{1,3}\s*Episode\s+\d+.*?)\n+',
+            re.IGNORECASE | re.MULTILINE,
+        ),
         # Preamble phrases
-        (r'^(?:Certainly|Sure|Of course|Absolutely)[!,.].*?\n+', re.IGNORECASE),
-        (r'^(?:Here\'s|Here is)[^\n]*(?:episode|story|chapter)[^\n]*:\s*\n+', re.IGNORECASE),
+        re.compile(r'^(?:Certainly|Sure|Of course|Absolutely)[!,.].*?\n+', re.IGNORECASE),
+        re.compile(r'^(?:Here\'s|Here is)[^\n]*(?:episode|story|chapter)[^\n]*:\s*\n+', re.IGNORECASE),
     ]
 
     def _clean_content(self, content: str) -> str:
         """Remove common LLM meta-commentary and ensure complete ending."""
         cleaned = content
 
-        for pattern, flags in self.CLEANUP_PATTERNS:
-            cleaned = re.sub(pattern, '', cleaned, flags=flags)
+        for pattern in self.CLEANUP_PATTERNS:
+            cleaned = pattern.sub('', cleaned)
 
         # Strip leading/trailing whitespace
         cleaned = cleaned.strip()
@@ -243,14 +309,14 @@ class StoryService:
         content = content.rstrip()
 
         # Check if content already ends with sentence-ending punctuation
-        if re.search(r'[.!?]["\']?$', content):
+        if _ENDS_WITH_PUNCTUATION.search(content):
             # Content ends properly, but check for truncated final paragraph
             return self._check_paragraph_completeness(content)
 
         # Content doesn't end with punctuation - find last complete sentence
-        matches = list(re.finditer(r'[.!?]["\']?(?=\s|$)', content))
-        if matches:
-            truncated = content[:matches[-1].end()].rstrip()
+        sentence_end = _last_sentence_end(content)
+        if sentence_end:
+            truncated = content[:sentence_end].rstrip()
             # Only use truncated version if we're keeping at least 80% of content
             if len(truncated) >= len(content) * 0.8:
                 return self._check_paragraph_completeness(truncated)
@@ -303,17 +369,17 @@ class StoryService:
             pacing=original_story.pacing,
         )
         db.add(forked_story)
-        db.commit()
-        db.refresh(forked_story)
-
-        # Copy characters
-        for sc in original_story.story_characters:
-            new_sc = StoryCharacter(
-                story_id=forked_story.id,
-                character_id=sc.character_id,
-                role=sc.role,
+        db.flush()  # Assign the fork's ID; everything below commits in one transaction
+
+        # Copy characters with a single INSERT ... SELECT, without loading them
+        db.execute(
+            insert(StoryCharacter).from_select(
+                ["story_id", "character_id", "role"],
+                select(
+                    literal(forked_story.id), StoryCharacter.character_id, StoryCharacter.role
+                ).where(StoryCharacter.story_id == story_id),
             )
-            db.add(new_sc)
+        )
 
         # Copy episodes up to fork point
         episodes_to_copy = (
@@ -323,48 +389,45 @@ class StoryService:
             .all()
         )
 
-        for ep in episodes_to_copy:
-            new_ep = Episode(
-                story_id=forked_story.id,
-                number=ep.number,
-                title=ep.title,
-                content=ep.content,
-                summary=ep.summary,
-                guidance=ep.guidance,
-                word_count=ep.word_count,
-            )
-            db.add(new_ep)
+        # Insert all copied episodes in one statement, returning their new IDs in order
+        copied_episode_ids = []
+        if episodes_to_copy:
+            copied_episode_ids = db.scalars(
+                insert(Episode).returning(Episode.id, sort_by_parameter_order=True),
+                [
+                    {
+                        "story_id": forked_story.id,
+                        "number": ep.number,
+                        "title": ep.title,
+                        "content": ep.content,
+                        "summary": ep.summary,
+                        "guidance": ep.guidance,
+                        "word_count": ep.word_count,
+                    }
+                    for ep in episodes_to_copy
+                ],
+            ).all()
 
         # Copy memory state at fork point
         fork_memory = (
             db.query(MemoryState)
-            .filter(MemoryState.story_id == story_id)
-            .join(Episode)
-            .filter(Episode.number == from_episode)
+            .join(Episode, MemoryState.episode_id == Episode.id)
+            .filter(Episode.story_id == story_id, Episode.number == from_episode)
             .first()
         )
 
-        if fork_memory:
-            # Get the last copied episode
-            db.commit()  # Commit to get the new episode IDs
-            last_episode = (
-                db.query(Episode)
-                .filter(Episode.story_id == forked_story.id)
-                .order_by(Episode.number.desc())
-                .first()
+        if fork_memory and copied_episode_ids:
+            # Attach it to the last copied episode
+            new_memory = MemoryState(
+                story_id=forked_story.id,
+                episode_id=copied_episode_ids[-1],
+                active_memory=fork_memory.active_memory,
+                background_memory=fork_memory.background_memory,
+                faded_memory=fork_memory.faded_memory,
+                character_states=fork_memory.character_states,
+                plot_threads=fork_memory.plot_threads,
             )
-
-            if last_episode:
-                new_memory = MemoryState(
-                    story_id=forked_story.id,
-                    episode_id=last_episode.id,
-                    active_memory=fork_memory.active_memory,
-                    background_memory=fork_memory.background_memory,
-                    faded_memory=fork_memory.faded_memory,
-                    character_states=fork_memory.character_states,
-                    plot_threads=fork_memory.plot_threads,
-                )
-                db.add(new_memory)
+            db.add(new_memory)
 
         db.commit()
         db.refresh(forked_story)
@@ -373,33 +436,81 @@ class StoryService:
     def get_story_tree(self, db: Session, story_id: int) -> dict:
         """Get the fork tree for a story."""
         # Find the root story
-        story = db.query(Story).filter(Story.id == story_id).first()
-        if not story:
+        root_id = self._find_root_id(db, story_id)
+        if root_id is None:
             raise ValueError("Story not found")
 
-        # Navigate to root
-        root = story
-        while root.parent_story_id:
-            root = db.query(Story).filter(Story.id == root.parent_story_id).first()
+        # Fetch every story in the tree with its episode count, then assemble in memory
+        rows = self._fetch_tree_rows(db, root_id)
+        nodes = {
+            row.id: {
+                "id": row.id,
+                "title": row.title,
+                "episode_count": row.episode_count,
+                "fork_from_episode": row.fork_from_episode,
+                "children": [],
+            }
+            for row in rows
+        }
+        for row in rows:
+            if row.id != root_id:
+                nodes[row.parent_story_id]["children"].append(nodes[row.id])
 
-        # Build tree recursively
-        return self._build_tree_node(db, root)
+        return nodes[root_id]
 
-    def _build_tree_node(self, db: Session, story: Story) -> dict:
-        """Build a tree node for a story."""
-        episode_count = db.query(Episode).filter(Episode.story_id == story.id).count()
+    def _find_root_id(self, db: Session, story_id: int) -> Optional[int]:
+        """Find the root of a story's fork tree, or None if the story doesn't exist.
 
-        children = []
-        for fork in story.forks:
-            children.append(self._build_tree_node(db, fork))
+        Walks up the parent chain with a recursive CTE in a single query.
+        """
+        ancestors = (
+            select(Story.id, Story.parent_story_id)
+            .where(Story.id == story_id)
+            .cte("ancestors", recursive=True)
+        )
+        ancestors = ancestors.union_all(
+            select(Story.id, Story.parent_story_id).where(
+                Story.id == ancestors.c.parent_story_id
+            )
+        )
+        return db.scalar(
+            select(ancestors.c.id).where(ancestors.c.parent_story_id.is_(None))
+        )
 
-        return {
-            "id": story.id,
-            "title": story.title,
-            "episode_count": episode_count,
-            "fork_from_episode": story.fork_from_episode,
-            "children": children,
-        }
+    def _fetch_tree_rows(self, db: Session, root_id: int) -> list:
+        """Fetch a story and all of its descendant forks with episode counts.
+
+        Uses a recursive CTE so the whole tree loads in a single query, ordered by ID
+        so children keep their creation order.
+        """
+        tree = (
+            select(Story.id)
+            .where(Story.id == root_id)
+            .cte("story_tree", recursive=True)
+        )
+        tree = tree.union_all(
+            select(Story.id).where(Story.parent_story_id == tree.c.id)
+        )
+
+        episode_counts = (
+            select(Episode.story_id, func.count(Episode.id).label("episode_count"))
+            .join(tree, tree.c.id == Episode.story_id)
+            .group_by(Episode.story_id)
+            .subquery()
+        )
+
+        return db.execute(
+            select(
+                Story.id,
+                Story.title,
+                Story.parent_story_id,
+                Story.fork_from_episode,
+                func.coalesce(episode_counts.c.episode_count, 0).label("episode_count"),
+            )
+            .join(tree, tree.c.id == Story.id)
+            .outerjoin(episode_counts, episode_counts.c.story_id == Story.id)
+            .order_by(Story.id)
+        ).all()
 
     def _get_story_settings(self, story: Story) -> dict:
         """Extract generation settings from a story with defaults."""
@@ -1,20 +1,186 @@
 """Base abstract class for TTS providers."""
 
 from abc import ABC, abstractmethod
-from typing import Optional, AsyncGenerator
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterable, Callable, Optional, AsyncGenerator
 from pathlib import Path
+import asyncio
+import time
 import uuid
 
+import httpx
+
+# Connection pool limits for each provider's shared HTTP client
+CLIENT_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+
+# How long (seconds) successful health checks and voice listings are reused
+HEALTH_CACHE_TTL = 30.0
+VOICES_CACHE_TTL = 300.0
+
+# Streamed audio is merged into pieces of at least this many bytes, unless
+# no more data arrives within the flush delay (seconds)
+STREAM_COALESCE_BYTES = 16 * 1024
+STREAM_FLUSH_DELAY = 0.02
+
+# Chunk size used when writing a generated audio response to disk
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+
+def ok_status(response: httpx.Response) -> Optional[bool]:
+    """Probe parser that accepts any 200 response and falls through otherwise."""
+    return True if response.status_code == 200 else None
+
+
+async def coalesce_chunks(
+    chunks: AsyncIterable[bytes],
+    min_size: int = STREAM_COALESCE_BYTES,
+    flush_delay: float = STREAM_FLUSH_DELAY,
+) -> AsyncGenerator[bytes, None]:
+    """Merge small streamed chunks into larger ones before yielding them.
+
+    Buffered data is sent once it reaches min_size bytes, or when the source
+    goes quiet for flush_delay seconds so playback is never held back.
+    """
+    iterator = chunks.__aiter__()
+    buffer = bytearray()
+    pending: Optional[asyncio.Future] = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(iterator.__anext__())
+            done, _ = await asyncio.wait(
+                {pending}, timeout=flush_delay if buffer else None
+            )
+            if not done:
+                # Source is slow; flush what we have and keep waiting
+                yield bytes(buffer)
+                buffer.clear()
+                continue
+            try:
+                buffer += pending.result()
+            except StopAsyncIteration:
+                break
+            finally:
+                pending = None
+            if len(buffer) >= min_size:
+                yield bytes(buffer)
+                buffer.clear()
+        if buffer:
+            yield bytes(buffer)
+    finally:
+        if pending is not None:
+            pending.cancel()
+            await asyncio.gather(pending, return_exceptions=True)
+
 
 class BaseTTSProvider(ABC):
     """Abstract base class for TTS providers."""
 
+    # Default timeout for the shared HTTP client; calls may override per request
+    request_timeout: float = 120.0
+
+    # Fixed size for streamed audio chunks; None forwards them as they arrive
+    stream_chunk_size: Optional[int] = None
+
     def __init__(self, base_url: str, default_voice: Optional[str] = None, settings: Optional[dict] = None):
         self.base_url = base_url.rstrip("/")
         self.default_voice = default_voice
         self.settings = settings or {}
         self.audio_dir = Path("./data/audio")
         self.audio_dir.mkdir(parents=True, exist_ok=True)
+        self._client: Optional[httpx.AsyncClient] = None
+        # Cached probe results: key -> (monotonic time stored, value)
+        self._cache: dict[str, tuple[float, object]] = {}
+        # In-flight generations shared by identical concurrent requests
+        self._inflight: dict[tuple, asyncio.Task] = {}
+        # Requests currently using the client, and whether to close it once idle
+        self._active = 0
+        self._retired = False
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Get the provider's shared HTTP client, creating it on first use."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.request_timeout,
+                limits=CLIENT_LIMITS,
+            )
+        return self._client
+
+    async def aclose(self):
+        """Close the shared HTTP client."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def aclose_when_idle(self):
+        """Close the shared HTTP client once no request is using it.
+
+        Used when the instance is dropped from a cache, so generations and
+        streams already running on it are not cut off.
+        """
+        self._retired = True
+        if self._active == 0:
+            await self.aclose()
+
+    @asynccontextmanager
+    async def in_use(self):
+        """Mark a request as using the client for the duration of the block."""
+        self._active += 1
+        try:
+            yield
+        finally:
+            self._active -= 1
+            if self._retired and self._active == 0:
+                await self.aclose()
+
+    def _cached(self, key: str, ttl: float):
+        """Return the value cached under key if it is younger than ttl, else None."""
+        entry = self._cache.get(key)
+        if entry is not None and time.monotonic() - entry[0] < ttl:
+            return entry[1]
+        return None
+
+    def _store(self, key: str, value):
+        """Cache a value under key and return it."""
+        self._cache[key] = (time.monotonic(), value)
+        return value
+
+    def invalidate_cache(self):
+        """Drop cached health and voice results so the next call hits the server."""
+        self._cache.clear()
+
+    async def _probe(
+        self,
+        probes: list[tuple[str, Callable[[httpx.Response], Any]]],
+        timeout: float,
+        headers: Optional[dict] = None,
+    ) -> Any:
+        """GET several endpoints concurrently and return the first accepted result.
+
+        Each probe is a (path, parse) pair, where parse returns None to fall through
+        to the next probe. Results are taken in list order, so the preferred endpoint
+        still wins; requests still in flight are cancelled once one is chosen.
+        Request and parse errors propagate like they would from a serial probe.
+        """
+        client = self._get_client()
+        tasks = [
+            asyncio.create_task(
+                client.get(f"{self.base_url}{path}", headers=headers, timeout=timeout)
+            )
+            for path, _ in probes
+        ]
+        try:
+            for task, (_, parse) in zip(tasks, probes):
+                result = parse(await task)
+                if result is not None:
+                    return result
+            return None
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    task.exception()  # Mark errors from skipped probes as retrieved
 
     @property
     @abstractmethod
@@ -54,6 +220,43 @@ class BaseTTSProvider(ABC):
         """
         pass
 
+    async def generate_audio_shared(
+        self,
+        text: str,
+        voice: Optional[str] = None,
+        speed: float = 1.0,
+        voice_clone_path: Optional[str] = None,
+    ) -> dict:
+        """Generate audio, sharing one request between identical concurrent calls.
+
+        Duplicate requests (retries, double clicks) that arrive while the first
+        is still running await its result instead of synthesizing again.
+        """
+        key = (text, voice, speed, voice_clone_path)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._generate_in_use(
+                text=text,
+                voice=voice,
+                speed=speed,
+                voice_clone_path=voice_clone_path,
+            ))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish_inflight(key, done))
+        # Shield so one caller disconnecting doesn't cancel the others
+        return dict(await asyncio.shield(task))
+
+    async def _generate_in_use(self, **kwargs) -> dict:
+        """Run generate_audio while holding the client in use."""
+        async with self.in_use():
+            return await self.generate_audio(**kwargs)
+
+    def _finish_inflight(self, key: tuple, task: asyncio.Task) -> None:
+        """Forget a finished generation, retrieving its error if nobody did."""
+        self._inflight.pop(key, None)
+        if not task.cancelled():
+            task.exception()
+
     async def generate_stream(
         self,
         text: str,
@@ -103,3 +306,18 @@ class BaseTTSProvider(ABC):
         filename = f"{uuid.uuid4()}.{extension}"
         filepath = self.audio_dir / filename
         return filename, filepath
+
+    async def _write_stream(self, response: httpx.Response, filepath: Path) -> None:
+        """Write a streamed response body to disk without buffering it in memory.
+
+        A partially written file is removed if the download fails.
+        """
+        f = await asyncio.to_thread(open, filepath, "wb")
+        try:
+            async for chunk in response.aiter_bytes(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                await asyncio.to_thread(f.write, chunk)
+        except BaseException:
+            await asyncio.to_thread(f.close)
+            filepath.unlink(missing_ok=True)
+            raise
+        await asyncio.to_thread(f.close)
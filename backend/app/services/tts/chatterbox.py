@@ -1,16 +1,42 @@
 """Chatterbox TTS provider implementation with voice cloning support."""
 
+import asyncio
 import httpx
-import aiofiles
+from contextlib import aclosing
 from typing import Optional, AsyncGenerator
 from pathlib import Path
 
-from app.services.tts.base import BaseTTSProvider
+from app.services.tts.base import (
+    BaseTTSProvider,
+    HEALTH_CACHE_TTL,
+    VOICES_CACHE_TTL,
+    coalesce_chunks,
+    ok_status,
+)
+
+
+def _prefer(endpoints: list[str], preferred: Optional[str]) -> list[str]:
+    """Move a previously working endpoint to the front of the probe order."""
+    if preferred in endpoints:
+        endpoints.remove(preferred)
+        endpoints.insert(0, preferred)
+    return endpoints
 
 
 class ChatterboxProvider(BaseTTSProvider):
     """Chatterbox TTS provider with voice cloning (native API on port 8000)."""
 
+    # Cloned and long-form generations can take a while
+    request_timeout = 180.0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Endpoints that last answered a generation, tried first on the next call
+        self._working_predefined_endpoint: Optional[str] = None
+        self._working_stream_endpoint: Optional[str] = None
+        # Server-side names of uploaded references: (path, mtime, size) -> filename
+        self._uploaded_references: dict[tuple, str] = {}
+
     @property
     def provider_type(self) -> str:
         return "chatterbox"
@@ -53,16 +79,16 @@ class ChatterboxProvider(BaseTTSProvider):
         if seed is not None:
             payload["seed"] = seed
 
-        async with httpx.AsyncClient(timeout=180.0) as client:
-            # If voice cloning is requested with a local reference file
-            if voice_clone_path and Path(voice_clone_path).exists():
-                return await self._generate_with_clone(
-                    client, payload, voice_clone_path
-                )
-            else:
-                # Use predefined voice
-                voice = voice or self.default_voice
-                return await self._generate_with_predefined(client, payload, voice)
+        client = self._get_client()
+        # If voice cloning is requested with a local reference file
+        if voice_clone_path and await asyncio.to_thread(Path(voice_clone_path).exists):
+            return await self._generate_with_clone(
+                client, payload, voice_clone_path
+            )
+        else:
+            # Use predefined voice
+            voice = voice or self.default_voice
+            return await self._generate_with_predefined(client, payload, voice)
 
     async def _generate_with_predefined(
         self,
@@ -77,72 +103,77 @@ class ChatterboxProvider(BaseTTSProvider):
         """
         # Try travisvn/chatterbox-tts-api endpoint first, then OpenAI-compatible,
         # then fall back to devnen-style endpoints
-        endpoints = ["/audio/speech", "/v1/audio/speech", "/tts", "/generate"]
+        endpoints = _prefer(
+            ["/audio/speech", "/v1/audio/speech", "/tts", "/generate"],
+            self._working_predefined_endpoint,
+        )
+
+        # OpenAI-compatible format (travisvn and standard OpenAI APIs), returns MP3
+        openai_payload = {
+            "model": "chatterbox",
+            "input": payload["text"],
+            "voice": voice or "default",
+            "speed": payload.get("speed_factor", 1.0),
+            "response_format": "mp3",  # Use MP3 for better streaming
+        }
+
+        # devnen-style payload, returns the configured format
+        devnen_payload = payload.copy()
+        devnen_payload["voice_mode"] = "predefined"
+        devnen_payload["predefined_voice_id"] = voice or "Abigail.wav"
+        output_format = payload.get("output_format", "wav")
+        devnen_extension = "ogg" if output_format == "opus" else output_format
+
         last_error = None
 
         for endpoint in endpoints:
+            if endpoint in ("/audio/speech", "/v1/audio/speech"):
+                request_payload, extension = openai_payload, "mp3"
+            else:
+                request_payload, extension = devnen_payload, devnen_extension
+
             try:
-                if endpoint in ("/audio/speech", "/v1/audio/speech"):
-                    # OpenAI-compatible format (travisvn and standard OpenAI APIs)
-                    openai_payload = {
-                        "model": "chatterbox",
-                        "input": payload["text"],
-                        "voice": voice or "default",
-                        "speed": payload.get("speed_factor", 1.0),
-                        "response_format": "mp3",  # Use MP3 for better streaming
-                    }
-                    response = await client.post(
-                        f"{self.base_url}{endpoint}",
-                        json=openai_payload,
-                    )
-                else:
-                    # devnen-style payload
-                    devnen_payload = payload.copy()
-                    devnen_payload["voice_mode"] = "predefined"
-                    voice_id = voice or "Abigail.wav"
-                    devnen_payload["predefined_voice_id"] = voice_id
-                    response = await client.post(
-                        f"{self.base_url}{endpoint}",
-                        json=devnen_payload,
-                    )
-
-                if response.status_code == 200:
-                    break
-                elif response.status_code in (404, 422):
-                    # 404 = endpoint doesn't exist, 422 = wrong payload format
-                    continue  # Try next endpoint
-                else:
-                    response.raise_for_status()
+                async with client.stream(
+                    "POST",
+                    f"{self.base_url}{endpoint}",
+                    json=request_payload,
+                ) as response:
+                    if response.status_code == 200:
+                        self._working_predefined_endpoint = endpoint
+                        # Stream the audio straight to disk
+                        filename, filepath = self._generate_filename(extension)
+                        await self._write_stream(response, filepath)
+                        return {
+                            "audio_url": f"/audio/{filename}",
+                            "filename": filename,
+                        }
+                    elif response.status_code in (404, 422):
+                        # 404 = endpoint doesn't exist, 422 = wrong payload format
+                        self._forget_predefined_endpoint(endpoint)
+                        continue  # Try next endpoint
+                    else:
+                        response.raise_for_status()
             except httpx.HTTPStatusError as e:
                 last_error = e
                 if e.response.status_code not in (404, 422):
                     raise
+                self._forget_predefined_endpoint(endpoint)
             except httpx.ConnectError as e:
                 raise Exception(f"Cannot connect to Chatterbox server at {self.base_url}: {e}")
-        else:
-            if last_error:
-                raise last_error
-            raise Exception(f"No working TTS endpoint found at {self.base_url}")
 
-        response.raise_for_status()
+        if last_error:
+            raise last_error
+        raise Exception(f"No working TTS endpoint found at {self.base_url}")
 
-        # Determine file extension based on which endpoint was used
-        # OpenAI-compatible endpoints return MP3, devnen endpoints return configured format
-        if endpoint in ("/audio/speech", "/v1/audio/speech"):
-            extension = "mp3"
-        else:
-            output_format = payload.get("output_format", "wav")
-            extension = "ogg" if output_format == "opus" else output_format
+    def _forget_predefined_endpoint(self, endpoint: str) -> None:
+        """Drop the remembered generation endpoint if it stopped working."""
+        if self._working_predefined_endpoint == endpoint:
+            self._working_predefined_endpoint = None
 
-        filename, filepath = self._generate_filename(extension)
-
-        async with aiofiles.open(filepath, "wb") as f:
-            await f.write(response.content)
-
-        return {
-            "audio_url": f"/audio/{filename}",
-            "filename": filename,
-        }
+    def _forget_stream_endpoint(self, endpoint: str) -> None:
+        """Drop the remembered streaming endpoint if it stopped working."""
+        if self._working_stream_endpoint == endpoint:
+            self._working_stream_endpoint = None
 
     async def _generate_with_clone(
         self,
@@ -151,29 +182,15 @@ class ChatterboxProvider(BaseTTSProvider):
         reference_audio_path: str,
     ) -> dict:
         """Generate audio using voice cloning with uploaded reference audio."""
-        # First, upload the reference audio to Chatterbox server
         ref_path = Path(reference_audio_path)
 
-        async with aiofiles.open(reference_audio_path, "rb") as f:
-            reference_audio = await f.read()
-
-        # Upload reference file to Chatterbox
-        files = {
-            "file": (ref_path.name, reference_audio, "audio/wav"),
-        }
-
-        upload_response = await client.post(
-            f"{self.base_url}/upload_reference",
-            files=files,
-        )
-
-        if upload_response.status_code == 200:
-            # Get the filename from the response or use the original name
-            upload_data = upload_response.json()
-            reference_filename = upload_data.get("filename", ref_path.name)
-        else:
-            # Fallback: assume the file is already on the server with same name
-            reference_filename = ref_path.name
+        # Reuse the server-side name of an earlier upload of the same file version
+        stat = await asyncio.to_thread(ref_path.stat)
+        ref_key = (str(ref_path), stat.st_mtime_ns, stat.st_size)
+        reference_filename = self._uploaded_references.get(ref_key)
+        reused = reference_filename is not None
+        if not reused:
+            reference_filename = await self._upload_reference(client, ref_path, ref_key)
 
         # Generate with clone mode
         payload["voice_mode"] = "clone"
@@ -183,6 +200,16 @@ class ChatterboxProvider(BaseTTSProvider):
             f"{self.base_url}/tts",
             json=payload,
         )
+        if reused and response.is_client_error:
+            # The server may have lost the earlier upload (e.g. after a restart)
+            self._uploaded_references.pop(ref_key, None)
+            payload["reference_audio_filename"] = await self._upload_reference(
+                client, ref_path, ref_key
+            )
+            response = await client.post(
+                f"{self.base_url}/tts",
+                json=payload,
+            )
         response.raise_for_status()
 
         # Determine file extension from output format
@@ -191,14 +218,41 @@ class ChatterboxProvider(BaseTTSProvider):
 
         filename, filepath = self._generate_filename(extension)
 
-        async with aiofiles.open(filepath, "wb") as f:
-            await f.write(response.content)
+        await asyncio.to_thread(filepath.write_bytes, response.content)
 
         return {
             "audio_url": f"/audio/{filename}",
             "filename": filename,
         }
 
+    async def _upload_reference(
+        self,
+        client: httpx.AsyncClient,
+        ref_path: Path,
+        ref_key: tuple,
+    ) -> str:
+        """Upload reference audio to Chatterbox and return its server-side filename."""
+        # httpx streams the file from the open handle
+        with open(ref_path, "rb") as reference_audio:
+            files = {
+                "file": (ref_path.name, reference_audio, "audio/wav"),
+            }
+
+            upload_response = await client.post(
+                f"{self.base_url}/upload_reference",
+                files=files,
+            )
+
+        if upload_response.status_code == 200:
+            # Get the filename from the response or use the original name
+            upload_data = upload_response.json()
+            reference_filename = upload_data.get("filename", ref_path.name)
+            self._uploaded_references[ref_key] = reference_filename
+            return reference_filename
+
+        # Fallback: assume the file is already on the server with same name
+        return ref_path.name
+
     async def generate_stream(
         self,
         text: str,
@@ -227,37 +281,45 @@ class ChatterboxProvider(BaseTTSProvider):
         }
 
         # Try streaming endpoints in order of preference
-        stream_endpoints = [
-            "/audio/speech/stream",  # travisvn dedicated streaming endpoint
-            "/audio/speech",         # travisvn with stream param
-            "/v1/audio/speech",      # OpenAI-compatible
-        ]
+        stream_endpoints = _prefer(
+            [
+                "/audio/speech/stream",  # travisvn dedicated streaming endpoint
+                "/audio/speech",         # travisvn with stream param
+                "/v1/audio/speech",      # OpenAI-compatible
+            ],
+            self._working_stream_endpoint,
+        )
 
-        # Get chunk size from settings (default 4096)
-        chunk_size = self.settings.get("chunk_size", 4096)
-
-        async with httpx.AsyncClient(timeout=180.0) as client:
-            for endpoint in stream_endpoints:
-                try:
-                    async with client.stream(
-                        "POST",
-                        f"{self.base_url}{endpoint}",
-                        json=payload,
-                    ) as response:
-                        if response.status_code in (404, 422):
-                            continue  # Try next endpoint
-                        response.raise_for_status()
-                        async for chunk in response.aiter_bytes(chunk_size=chunk_size):
-                            if chunk:
-                                yield chunk
-                        return  # Successfully streamed
-                except httpx.HTTPStatusError as e:
-                    if e.response.status_code in (404, 422):
+        # Optional fixed chunk size from settings, else the class default
+        chunk_size = self.settings.get("chunk_size", self.stream_chunk_size)
+
+        client = self._get_client()
+        for endpoint in stream_endpoints:
+            try:
+                async with client.stream(
+                    "POST",
+                    f"{self.base_url}{endpoint}",
+                    json=payload,
+                ) as response:
+                    if response.status_code in (404, 422):
+                        self._forget_stream_endpoint(endpoint)
                         continue  # Try next endpoint
-                    raise
+                    response.raise_for_status()
+                    self._working_stream_endpoint = endpoint
+                    async with aclosing(coalesce_chunks(
+                        response.aiter_bytes(chunk_size=chunk_size)
+                    )) as chunks:
+                        async for chunk in chunks:
+                            yield chunk
+                    return  # Successfully streamed
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code in (404, 422):
+                    self._forget_stream_endpoint(endpoint)
+                    continue  # Try next endpoint
+                raise
 
-            # If all endpoints failed, raise an error
-            raise Exception(f"No working streaming endpoint found at {self.base_url}")
+        # If all endpoints failed, raise an error
+        raise Exception(f"No working streaming endpoint found at {self.base_url}")
 
     async def list_voices(self) -> list[dict]:
         """List available Chatterbox predefined voices.
@@ -265,60 +327,22 @@ class ChatterboxProvider(BaseTTSProvider):
         Supports travisvn/chatterbox-tts-api, OpenAI-compatible APIs,
         and devnen/Chatterbox-TTS-Server endpoints.
         """
+        cached = self._cached("voices", VOICES_CACHE_TTL)
+        if cached is not None:
+            return cached
+
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                # Try travisvn endpoint first
-                response = await client.get(f"{self.base_url}/voices")
-                if response.status_code == 200:
-                    data = response.json()
-                    voices = data.get("voices", [])
-                    if voices:
-                        return self._normalize_voice_list(voices)
-
-                # Try OpenAI-compatible endpoint
-                response = await client.get(f"{self.base_url}/v1/audio/voices")
-                if response.status_code == 200:
-                    data = response.json()
-                    voices = data.get("voices", [])
-                    if voices:
-                        return self._normalize_voice_list(voices)
-
-                # Fall back to devnen API endpoint
-                response = await client.get(f"{self.base_url}/get_predefined_voices")
-                if response.status_code == 200:
-                    data = response.json()
-                    voices = []
-
-                    if isinstance(data, list):
-                        for voice in data:
-                            voices.append(self._parse_voice(voice))
-                    elif isinstance(data, dict):
-                        # Check for common wrapper keys
-                        if "voices" in data:
-                            for voice in data["voices"]:
-                                voices.append(self._parse_voice(voice))
-                        elif "predefined_voices" in data:
-                            for voice in data["predefined_voices"]:
-                                voices.append(self._parse_voice(voice))
-                        else:
-                            # Dict with voice IDs as keys: {"voice_id": {...}, ...}
-                            for voice_id, voice_data in data.items():
-                                if isinstance(voice_data, dict):
-                                    voices.append({
-                                        "id": voice_id,
-                                        "name": voice_data.get("name", voice_id),
-                                        "language": voice_data.get("language", "en"),
-                                        "gender": voice_data.get("gender", "unknown"),
-                                    })
-                                else:
-                                    voices.append({
-                                        "id": voice_id,
-                                        "name": voice_id,
-                                        "language": "en",
-                                        "gender": "unknown",
-                                    })
-
-                    return voices if voices else [{"id": "default", "name": "Default Voice", "language": "en", "gender": "unknown"}]
+            # Query every known voices endpoint at once; earlier ones take precedence
+            voices = await self._probe(
+                [
+                    ("/voices", self._parse_voices_response),  # travisvn
+                    ("/v1/audio/voices", self._parse_voices_response),  # OpenAI-compatible
+                    ("/get_predefined_voices", self._parse_predefined_voices),  # devnen
+                ],
+                timeout=10.0,
+            )
+            if voices is not None:
+                return self._store("voices", voices)
         except Exception:
             pass
 
@@ -327,6 +351,53 @@ class ChatterboxProvider(BaseTTSProvider):
             {"id": "default", "name": "Default Voice", "language": "en", "gender": "unknown"},
         ]
 
+    def _parse_voices_response(self, response: httpx.Response) -> Optional[list[dict]]:
+        """Parse a travisvn / OpenAI-compatible voices response; None if unusable."""
+        if response.status_code == 200:
+            voices = response.json().get("voices", [])
+            if voices:
+                return self._normalize_voice_list(voices)
+        return None
+
+    def _parse_predefined_voices(self, response: httpx.Response) -> Optional[list[dict]]:
+        """Parse a devnen predefined voices response; None if unavailable."""
+        if response.status_code != 200:
+            return None
+
+        data = response.json()
+        voices = []
+
+        if isinstance(data, list):
+            for voice in data:
+                voices.append(self._parse_voice(voice))
+        elif isinstance(data, dict):
+            # Check for common wrapper keys
+            if "voices" in data:
+                for voice in data["voices"]:
+                    voices.append(self._parse_voice(voice))
+            elif "predefined_voices" in data:
+                for voice in data["predefined_voices"]:
+                    voices.append(self._parse_voice(voice))
+            else:
+                # Dict with voice IDs as keys: {"voice_id": {...}, ...}
+                for voice_id, voice_data in data.items():
+                    if isinstance(voice_data, dict):
+                        voices.append({
+                            "id": voice_id,
+                            "name": voice_data.get("name", voice_id),
+                            "language": voice_data.get("language", "en"),
+                            "gender": voice_data.get("gender", "unknown"),
+                        })
+                    else:
+                        voices.append({
+                            "id": voice_id,
+                            "name": voice_id,
+                            "language": "en",
+                            "gender": "unknown",
+                        })
+
+        return voices if voices else [{"id": "default", "name": "Default Voice", "language": "en", "gender": "unknown"}]
+
     def _normalize_voice_list(self, voices: list) -> list[dict]:
         """Normalize voice list from OpenAI-compatible API."""
         normalized = []
@@ -392,14 +463,14 @@ class ChatterboxProvider(BaseTTSProvider):
     async def get_reference_files(self) -> list[str]:
         """Get list of uploaded reference audio files from Chatterbox server."""
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(f"{self.base_url}/get_reference_files")
-                if response.status_code == 200:
-                    data = response.json()
-                    if isinstance(data, list):
-                        return data
-                    elif isinstance(data, dict):
-                        return data.get("files", [])
+            client = self._get_client()
+            response = await client.get(f"{self.base_url}/get_reference_files", timeout=10.0)
+            if response.status_code == 200:
+                data = response.json()
+                if isinstance(data, list):
+                    return data
+                elif isinstance(data, dict):
+                    return data.get("files", [])
         except Exception:
             pass
         return []
@@ -410,41 +481,36 @@ class ChatterboxProvider(BaseTTSProvider):
         Supports travisvn/chatterbox-tts-api, OpenAI-compatible APIs,
         and devnen/Chatterbox-TTS-Server endpoints.
         """
+        # Reuse a recent successful check; failures are re-probed every time
+        if self._cached("health", HEALTH_CACHE_TTL):
+            return True
+
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                # Try travisvn health endpoint first - checks if model is loaded
-                response = await client.get(f"{self.base_url}/health")
-                if response.status_code == 200:
-                    try:
-                        data = response.json()
-                        # travisvn API returns model_loaded status
-                        if isinstance(data, dict) and "model_loaded" in data:
-                            return data.get("model_loaded", False)
-                    except Exception:
-                        pass
-                    return True
-
-                # Try travisvn voices endpoint
-                response = await client.get(f"{self.base_url}/voices")
-                if response.status_code == 200:
-                    return True
-
-                # Try OpenAI-compatible voices endpoint
-                response = await client.get(f"{self.base_url}/v1/audio/voices")
-                if response.status_code == 200:
-                    return True
-
-                # Fallback to devnen API endpoints
-                response = await client.get(f"{self.base_url}/api/ui/initial-data")
-                if response.status_code == 200:
-                    return True
-
-                response = await client.get(f"{self.base_url}/get_predefined_voices")
-                if response.status_code == 200:
-                    return True
-
-                # Final fallback to root
-                response = await client.get(f"{self.base_url}/")
-                return response.status_code == 200
+            # Probe every known endpoint at once; earlier ones take precedence
+            healthy = await self._probe(
+                [
+                    ("/health", self._parse_health_response),  # travisvn, reports model load
+                    ("/voices", ok_status),  # travisvn
+                    ("/v1/audio/voices", ok_status),  # OpenAI-compatible
+                    ("/api/ui/initial-data", ok_status),  # devnen
+                    ("/get_predefined_voices", ok_status),  # devnen
+                    ("/", ok_status),
+                ],
+                timeout=5.0,
+            )
+            return self._store("health", bool(healthy))
         except Exception:
             return False
+
+    def _parse_health_response(self, response: httpx.Response) -> Optional[bool]:
+        """Parse the /health response, honouring travisvn's model_loaded flag."""
+        if response.status_code != 200:
+            return None
+        try:
+            data = response.json()
+            # travisvn API returns model_loaded status
+            if isinstance(data, dict) and "model_loaded" in data:
+                return bool(data.get("model_loaded", False))
+        except Exception:
+            pass
+        return True
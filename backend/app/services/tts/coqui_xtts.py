@@ -1,17 +1,33 @@
 """Coqui XTTS provider implementation with voice cloning support."""
 
+import asyncio
 import httpx
-import aiofiles
 import base64
+from contextlib import aclosing
 from typing import Optional, AsyncGenerator
 from pathlib import Path
 
-from app.services.tts.base import BaseTTSProvider
+from app.services.tts.base import (
+    BaseTTSProvider,
+    HEALTH_CACHE_TTL,
+    VOICES_CACHE_TTL,
+    coalesce_chunks,
+    ok_status,
+)
+
+
+def _encode_file(path: str) -> str:
+    """Read a file and return its contents base64-encoded."""
+    with open(path, "rb") as f:
+        return base64.b64encode(f.read()).decode("utf-8")
 
 
 class CoquiXTTSProvider(BaseTTSProvider):
     """Coqui XTTS provider with voice cloning (OpenAI-compatible, port 8000)."""
 
+    # Cloned and long-form generations can take a while
+    request_timeout = 180.0
+
     @property
     def provider_type(self) -> str:
         return "coqui_xtts"
@@ -35,18 +51,18 @@ class CoquiXTTSProvider(BaseTTSProvider):
         voice = voice or self.default_voice
         language = self.settings.get("language", "en")
 
-        async with httpx.AsyncClient(timeout=180.0) as client:
-            # If voice cloning is requested and we have a reference audio
-            if voice_clone_path and Path(voice_clone_path).exists():
-                # Use XTTS clone endpoint with reference audio
-                return await self._generate_with_clone(
-                    client, text, voice_clone_path, language, speed
-                )
-            else:
-                # Use OpenAI-compatible endpoint for standard voices
-                return await self._generate_standard(
-                    client, text, voice, language, speed
-                )
+        client = self._get_client()
+        # If voice cloning is requested and we have a reference audio
+        if voice_clone_path and await asyncio.to_thread(Path(voice_clone_path).exists):
+            # Use XTTS clone endpoint with reference audio
+            return await self._generate_with_clone(
+                client, text, voice_clone_path, language, speed
+            )
+        else:
+            # Use OpenAI-compatible endpoint for standard voices
+            return await self._generate_standard(
+                client, text, voice, language, speed
+            )
 
     async def _generate_standard(
         self,
@@ -69,16 +85,15 @@ class CoquiXTTSProvider(BaseTTSProvider):
         if language:
             payload["language"] = language
 
-        response = await client.post(
-            f"{self.base_url}/v1/audio/speech",
-            json=payload,
-        )
-        response.raise_for_status()
-
         filename, filepath = self._generate_filename("mp3")
 
-        async with aiofiles.open(filepath, "wb") as f:
-            await f.write(response.content)
+        async with client.stream(
+            "POST",
+            f"{self.base_url}/v1/audio/speech",
+            json=payload,
+        ) as response:
+            response.raise_for_status()
+            await self._write_stream(response, filepath)
 
         return {
             "audio_url": f"/audio/{filename}",
@@ -94,16 +109,26 @@ class CoquiXTTSProvider(BaseTTSProvider):
         speed: float,
     ) -> dict:
         """Generate audio using voice cloning with reference audio."""
-        # Read the reference audio file
-        async with aiofiles.open(reference_audio_path, "rb") as f:
-            reference_audio = await f.read()
+        # Try the multipart /clone endpoint first, letting httpx stream the
+        # reference from disk
+        with open(reference_audio_path, "rb") as speaker_wav:
+            files = {
+                "text": (None, text),
+                "language": (None, language),
+                "speaker_wav": ("reference.wav", speaker_wav, "audio/wav"),
+            }
 
-        # XTTS clone API expects the reference audio
-        # Try the /tts_to_audio endpoint first (common XTTS API)
-        try:
+            response = await client.post(
+                f"{self.base_url}/clone",
+                files=files,
+            )
+
+        if response.status_code in (404, 405, 422):
+            # Fallback: /tts_to_audio with base64 reference (common XTTS API),
+            # encoded off the event loop
             payload = {
                 "text": text,
-                "speaker_wav": base64.b64encode(reference_audio).decode("utf-8"),
+                "speaker_wav": await asyncio.to_thread(_encode_file, reference_audio_path),
                 "language": language,
                 "speed": speed,
             }
@@ -112,35 +137,11 @@ class CoquiXTTSProvider(BaseTTSProvider):
                 f"{self.base_url}/tts_to_audio",
                 json=payload,
             )
-
-            if response.status_code == 200:
-                filename, filepath = self._generate_filename("wav")
-                async with aiofiles.open(filepath, "wb") as f:
-                    await f.write(response.content)
-                return {
-                    "audio_url": f"/audio/{filename}",
-                    "filename": filename,
-                }
-        except Exception:
-            pass
-
-        # Fallback: Try /clone endpoint (alternative XTTS API format)
-        files = {
-            "text": (None, text),
-            "language": (None, language),
-            "speaker_wav": ("reference.wav", reference_audio, "audio/wav"),
-        }
-
-        response = await client.post(
-            f"{self.base_url}/clone",
-            files=files,
-        )
         response.raise_for_status()
 
         filename, filepath = self._generate_filename("wav")
 
-        async with aiofiles.open(filepath, "wb") as f:
-            await f.write(response.content)
+        await asyncio.to_thread(filepath.write_bytes, response.content)
 
         return {
             "audio_url": f"/audio/{filename}",
@@ -170,48 +171,37 @@ class CoquiXTTSProvider(BaseTTSProvider):
         if language:
             payload["language"] = language
 
-        async with httpx.AsyncClient(timeout=180.0) as client:
-            async with client.stream(
-                "POST",
-                f"{self.base_url}/v1/audio/speech",
-                json=payload,
-            ) as response:
-                response.raise_for_status()
-                async for chunk in response.aiter_bytes(chunk_size=4096):
-                    if chunk:
-                        yield chunk
+        client = self._get_client()
+        async with client.stream(
+            "POST",
+            f"{self.base_url}/v1/audio/speech",
+            json=payload,
+        ) as response:
+            response.raise_for_status()
+            # Forward chunks as they arrive, merging small bursts
+            async with aclosing(coalesce_chunks(
+                response.aiter_bytes(chunk_size=self.stream_chunk_size)
+            )) as chunks:
+                async for chunk in chunks:
+                    yield chunk
 
     async def list_voices(self) -> list[dict]:
         """List available XTTS voices."""
+        cached = self._cached("voices", VOICES_CACHE_TTL)
+        if cached is not None:
+            return cached
+
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                # Try OpenAI-compatible voices endpoint
-                response = await client.get(f"{self.base_url}/v1/audio/voices")
-                if response.status_code == 200:
-                    data = response.json()
-                    return data.get("voices", [])
-
-                # Try XTTS-specific speakers endpoint
-                response = await client.get(f"{self.base_url}/speakers")
-                if response.status_code == 200:
-                    data = response.json()
-                    voices = []
-                    for speaker in data:
-                        if isinstance(speaker, dict):
-                            voices.append({
-                                "id": speaker.get("name", speaker.get("id")),
-                                "name": speaker.get("name", "Unknown"),
-                                "language": speaker.get("language", "en"),
-                                "gender": speaker.get("gender", "unknown"),
-                            })
-                        else:
-                            voices.append({
-                                "id": speaker,
-                                "name": speaker,
-                                "language": "en",
-                                "gender": "unknown",
-                            })
-                    return voices
+            # Query both voice endpoints at once; the OpenAI-compatible one takes precedence
+            voices = await self._probe(
+                [
+                    ("/v1/audio/voices", self._parse_voices_response),
+                    ("/speakers", self._parse_speakers_response),  # XTTS-specific
+                ],
+                timeout=10.0,
+            )
+            if voices is not None:
+                return self._store("voices", voices)
         except Exception:
             pass
 
@@ -220,20 +210,51 @@ class CoquiXTTSProvider(BaseTTSProvider):
             {"id": "default", "name": "Default XTTS Voice", "language": "en", "gender": "unknown"},
         ]
 
+    def _parse_voices_response(self, response: httpx.Response) -> Optional[list[dict]]:
+        """Parse an OpenAI-compatible voices response; None if unavailable."""
+        if response.status_code != 200:
+            return None
+        return response.json().get("voices", [])
+
+    def _parse_speakers_response(self, response: httpx.Response) -> Optional[list[dict]]:
+        """Parse an XTTS speakers response; None if unavailable."""
+        if response.status_code != 200:
+            return None
+
+        voices = []
+        for speaker in response.json():
+            if isinstance(speaker, dict):
+                voices.append({
+                    "id": speaker.get("name", speaker.get("id")),
+                    "name": speaker.get("name", "Unknown"),
+                    "language": speaker.get("language", "en"),
+                    "gender": speaker.get("gender", "unknown"),
+                })
+            else:
+                voices.append({
+                    "id": speaker,
+                    "name": speaker,
+                    "language": "en",
+                    "gender": "unknown",
+                })
+        return voices
+
     async def health_check(self) -> bool:
         """Check if XTTS is available."""
+        # Reuse a recent successful check; failures are re-probed every time
+        if self._cached("health", HEALTH_CACHE_TTL):
+            return True
+
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                # Try health endpoint
-                response = await client.get(f"{self.base_url}/health")
-                if response.status_code == 200:
-                    return True
-                # Try speakers endpoint
-                response = await client.get(f"{self.base_url}/speakers")
-                if response.status_code == 200:
-                    return True
-                # Try voices endpoint
-                response = await client.get(f"{self.base_url}/v1/audio/voices")
-                return response.status_code == 200
+            # Probe every known endpoint at once; any 200 means the server is up
+            healthy = await self._probe(
+                [
+                    ("/health", ok_status),
+                    ("/speakers", ok_status),
+                    ("/v1/audio/voices", ok_status),
+                ],
+                timeout=5.0,
+            )
+            return self._store("health", bool(healthy))
         except Exception:
             return False
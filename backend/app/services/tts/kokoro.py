@@ -1,15 +1,42 @@
 """Kokoro TTS provider implementation."""
 
-import httpx
-import aiofiles
+from contextlib import aclosing
 from typing import Optional, AsyncGenerator
 
-from app.services.tts.base import BaseTTSProvider
+from app.services.tts.base import (
+    BaseTTSProvider,
+    VOICES_CACHE_TTL,
+    coalesce_chunks,
+    ok_status,
+)
+
+
+# Known voice ID prefixes: prefix -> (type name, language, gender)
+_PREFIXES = {
+    "af_": ("American Female", "en-US", "female"),
+    "am_": ("American Male", "en-US", "male"),
+    "bf_": ("British Female", "en-GB", "female"),
+    "bm_": ("British Male", "en-GB", "male"),
+}
 
 
 class KokoroProvider(BaseTTSProvider):
     """Kokoro TTS provider (OpenAI-compatible API on port 8880)."""
 
+    # Voices offered when the server can't list its own
+    DEFAULT_VOICES = [
+        {"id": "af_bella", "name": "Bella (American Female)", "language": "en-US", "gender": "female"},
+        {"id": "af_sarah", "name": "Sarah (American Female)", "language": "en-US", "gender": "female"},
+        {"id": "af_nicole", "name": "Nicole (American Female)", "language": "en-US", "gender": "female"},
+        {"id": "af_sky", "name": "Sky (American Female)", "language": "en-US", "gender": "female"},
+        {"id": "am_adam", "name": "Adam (American Male)", "language": "en-US", "gender": "male"},
+        {"id": "am_michael", "name": "Michael (American Male)", "language": "en-US", "gender": "male"},
+        {"id": "bf_emma", "name": "Emma (British Female)", "language": "en-GB", "gender": "female"},
+        {"id": "bf_isabella", "name": "Isabella (British Female)", "language": "en-GB", "gender": "female"},
+        {"id": "bm_george", "name": "George (British Male)", "language": "en-GB", "gender": "male"},
+        {"id": "bm_lewis", "name": "Lewis (British Male)", "language": "en-GB", "gender": "male"},
+    ]
+
     @property
     def provider_type(self) -> str:
         return "kokoro"
@@ -40,23 +67,22 @@ class KokoroProvider(BaseTTSProvider):
             "response_format": "mp3",
         }
 
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            response = await client.post(
-                f"{self.base_url}/v1/audio/speech",
-                json=payload,
-            )
-            response.raise_for_status()
-
-            # Save audio to file
-            filename, filepath = self._generate_filename("mp3")
+        filename, filepath = self._generate_filename("mp3")
 
-            async with aiofiles.open(filepath, "wb") as f:
-                await f.write(response.content)
+        # Stream the audio straight to file
+        client = self._get_client()
+        async with client.stream(
+            "POST",
+            f"{self.base_url}/v1/audio/speech",
+            json=payload,
+        ) as response:
+            response.raise_for_status()
+            await self._write_stream(response, filepath)
 
-            return {
-                "audio_url": f"/audio/{filename}",
-                "filename": filename,
-            }
+        return {
+            "audio_url": f"/audio/{filename}",
+            "filename": filename,
+        }
 
     async def generate_stream(
         self,
@@ -77,27 +103,33 @@ class KokoroProvider(BaseTTSProvider):
             "stream": True,
         }
 
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            async with client.stream(
-                "POST",
-                f"{self.base_url}/v1/audio/speech",
-                json=payload,
-            ) as response:
-                response.raise_for_status()
-                async for chunk in response.aiter_bytes(chunk_size=4096):
-                    if chunk:
-                        yield chunk
+        client = self._get_client()
+        async with client.stream(
+            "POST",
+            f"{self.base_url}/v1/audio/speech",
+            json=payload,
+        ) as response:
+            response.raise_for_status()
+            async with aclosing(coalesce_chunks(
+                response.aiter_bytes(chunk_size=self.stream_chunk_size)
+            )) as chunks:
+                async for chunk in chunks:
+                    yield chunk
 
     async def list_voices(self) -> list[dict]:
         """List available Kokoro TTS voices."""
+        cached = self._cached("voices", VOICES_CACHE_TTL)
+        if cached is not None:
+            return cached
+
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(f"{self.base_url}/v1/audio/voices")
-                if response.status_code == 200:
-                    data = response.json()
-                    voices = data.get("voices", [])
-                    # Normalize: convert string voice IDs to dicts
-                    return self._normalize_voices(voices)
+            client = self._get_client()
+            response = await client.get(f"{self.base_url}/v1/audio/voices", timeout=10.0)
+            if response.status_code == 200:
+                data = response.json()
+                voices = data.get("voices", [])
+                # Normalize: convert string voice IDs to dicts
+                return self._store("voices", self._normalize_voices(voices))
         except Exception:
             pass
 
@@ -121,49 +153,31 @@ class KokoroProvider(BaseTTSProvider):
         # e.g., af_bella -> American Female Bella
         voice_info = {"id": voice_id, "name": voice_id}
 
-        # Known voice prefixes
-        prefixes = {
-            "af_": ("American Female", "en-US", "female"),
-            "am_": ("American Male", "en-US", "male"),
-            "bf_": ("British Female", "en-GB", "female"),
-            "bm_": ("British Male", "en-GB", "male"),
-        }
-
-        for prefix, (type_name, language, gender) in prefixes.items():
-            if voice_id.startswith(prefix):
-                name_part = voice_id[len(prefix):].replace("_", " ").title()
-                voice_info["name"] = f"{name_part} ({type_name})"
-                voice_info["language"] = language
-                voice_info["gender"] = gender
-                break
+        known = _PREFIXES.get(voice_id[:3])
+        if known:
+            type_name, language, gender = known
+            name_part = voice_id[3:].replace("_", " ").title()
+            voice_info["name"] = f"{name_part} ({type_name})"
+            voice_info["language"] = language
+            voice_info["gender"] = gender
 
         return voice_info
 
     def _get_default_voices(self) -> list[dict]:
         """Return default Kokoro voices."""
-        return [
-            {"id": "af_bella", "name": "Bella (American Female)", "language": "en-US", "gender": "female"},
-            {"id": "af_sarah", "name": "Sarah (American Female)", "language": "en-US", "gender": "female"},
-            {"id": "af_nicole", "name": "Nicole (American Female)", "language": "en-US", "gender": "female"},
-            {"id": "af_sky", "name": "Sky (American Female)", "language": "en-US", "gender": "female"},
-            {"id": "am_adam", "name": "Adam (American Male)", "language": "en-US", "gender": "male"},
-            {"id": "am_michael", "name": "Michael (American Male)", "language": "en-US", "gender": "male"},
-            {"id": "bf_emma", "name": "Emma (British Female)", "language": "en-GB", "gender": "female"},
-            {"id": "bf_isabella", "name": "Isabella (British Female)", "language": "en-GB", "gender": "female"},
-            {"id": "bm_george", "name": "George (British Male)", "language": "en-GB", "gender": "male"},
-            {"id": "bm_lewis", "name": "Lewis (British Male)", "language": "en-GB", "gender": "male"},
-        ]
+        return self.DEFAULT_VOICES
 
     async def health_check(self) -> bool:
         """Check if Kokoro TTS is available."""
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                # Try health endpoint first
-                response = await client.get(f"{self.base_url}/health")
-                if response.status_code == 200:
-                    return True
-                # Fallback to voices endpoint
-                response = await client.get(f"{self.base_url}/v1/audio/voices")
-                return response.status_code == 200
+            # Probe the health and voices endpoints at once; either 200 will do
+            healthy = await self._probe(
+                [
+                    ("/health", ok_status),
+                    ("/v1/audio/voices", ok_status),
+                ],
+                timeout=5.0,
+            )
+            return bool(healthy)
         except Exception:
             return False
@@ -20,10 +20,9 @@ class TTSProviderManager:
     @staticmethod
     def get_provider_by_id(db: Session, provider_id: int) -> Optional[TTSProvider]:
         """Get a specific TTS provider by ID."""
-        return db.query(TTSProvider).filter(
-            TTSProvider.id == provider_id,
-            TTSProvider.enabled == True
-        ).first()
+        # Primary-key lookup, served from the session's identity map when loaded
+        provider = db.get(TTSProvider, provider_id)
+        return provider if provider and provider.enabled else None
 
     @staticmethod
     def get_all_providers(db: Session, enabled_only: bool = True) -> list[TTSProvider]:
@@ -49,9 +48,7 @@ class TTSProviderManager:
     @staticmethod
     def get_voice_clone(db: Session, voice_clone_id: int) -> Optional[TTSVoiceClone]:
         """Get a specific voice clone by ID."""
-        return db.query(TTSVoiceClone).filter(
-            TTSVoiceClone.id == voice_clone_id
-        ).first()
+        return db.get(TTSVoiceClone, voice_clone_id)
 
     @staticmethod
     def get_voice_clones_for_provider(db: Session, provider_id: int) -> list[TTSVoiceClone]:
@@ -87,9 +84,7 @@ class TTSProviderManager:
     @staticmethod
     def delete_voice_clone(db: Session, voice_clone_id: int) -> bool:
         """Delete a voice clone."""
-        voice_clone = db.query(TTSVoiceClone).filter(
-            TTSVoiceClone.id == voice_clone_id
-        ).first()
+        voice_clone = db.get(TTSVoiceClone, voice_clone_id)
         if voice_clone:
             db.delete(voice_clone)
             db.commit()
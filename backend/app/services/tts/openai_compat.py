@@ -1,15 +1,29 @@
 """Generic OpenAI-compatible TTS provider implementation."""
 
-import httpx
-import aiofiles
+from contextlib import aclosing
 from typing import Optional, AsyncGenerator
 
-from app.services.tts.base import BaseTTSProvider
+from app.services.tts.base import (
+    BaseTTSProvider,
+    VOICES_CACHE_TTL,
+    coalesce_chunks,
+    ok_status,
+)
 
 
 class OpenAICompatProvider(BaseTTSProvider):
     """Generic OpenAI-compatible TTS provider."""
 
+    # Voices offered when the server can't list its own
+    DEFAULT_VOICES = [
+        {"id": "alloy", "name": "Alloy", "language": "en", "gender": "neutral"},
+        {"id": "echo", "name": "Echo", "language": "en", "gender": "male"},
+        {"id": "fable", "name": "Fable", "language": "en", "gender": "female"},
+        {"id": "onyx", "name": "Onyx", "language": "en", "gender": "male"},
+        {"id": "nova", "name": "Nova", "language": "en", "gender": "female"},
+        {"id": "shimmer", "name": "Shimmer", "language": "en", "gender": "female"},
+    ]
+
     @property
     def provider_type(self) -> str:
         return "openai_compatible"
@@ -52,25 +66,25 @@ class OpenAICompatProvider(BaseTTSProvider):
         if api_key:
             headers["Authorization"] = f"Bearer {api_key}"
 
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            response = await client.post(
-                f"{self.base_url}/v1/audio/speech",
-                json=payload,
-                headers=headers,
-            )
+        # Determine file extension from response format
+        ext = response_format if response_format in ["mp3", "wav", "opus", "aac", "flac"] else "mp3"
+        filename, filepath = self._generate_filename(ext)
+
+        # Stream the audio straight to file
+        client = self._get_client()
+        async with client.stream(
+            "POST",
+            f"{self.base_url}/v1/audio/speech",
+            json=payload,
+            headers=headers,
+        ) as response:
             response.raise_for_status()
+            await self._write_stream(response, filepath)
 
-            # Determine file extension from response format
-            ext = response_format if response_format in ["mp3", "wav", "opus", "aac", "flac"] else "mp3"
-            filename, filepath = self._generate_filename(ext)
-
-            async with aiofiles.open(filepath, "wb") as f:
-                await f.write(response.content)
-
-            return {
-                "audio_url": f"/audio/{filename}",
-                "filename": filename,
-            }
+        return {
+            "audio_url": f"/audio/{filename}",
+            "filename": filename,
+        }
 
     async def generate_stream(
         self,
@@ -104,46 +118,46 @@ class OpenAICompatProvider(BaseTTSProvider):
         if api_key:
             headers["Authorization"] = f"Bearer {api_key}"
 
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            async with client.stream(
-                "POST",
-                f"{self.base_url}/v1/audio/speech",
-                json=payload,
-                headers=headers,
-            ) as response:
-                response.raise_for_status()
-                async for chunk in response.aiter_bytes(chunk_size=4096):
-                    if chunk:
-                        yield chunk
+        client = self._get_client()
+        async with client.stream(
+            "POST",
+            f"{self.base_url}/v1/audio/speech",
+            json=payload,
+            headers=headers,
+        ) as response:
+            response.raise_for_status()
+            async with aclosing(coalesce_chunks(
+                response.aiter_bytes(chunk_size=self.stream_chunk_size)
+            )) as chunks:
+                async for chunk in chunks:
+                    yield chunk
 
     async def list_voices(self) -> list[dict]:
         """List available voices."""
+        cached = self._cached("voices", VOICES_CACHE_TTL)
+        if cached is not None:
+            return cached
+
         try:
             headers = {}
             api_key = self.settings.get("api_key")
             if api_key:
                 headers["Authorization"] = f"Bearer {api_key}"
 
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(
-                    f"{self.base_url}/v1/audio/voices",
-                    headers=headers,
-                )
-                if response.status_code == 200:
-                    data = response.json()
-                    return data.get("voices", [])
+            client = self._get_client()
+            response = await client.get(
+                f"{self.base_url}/v1/audio/voices",
+                headers=headers,
+                timeout=10.0,
+            )
+            if response.status_code == 200:
+                data = response.json()
+                return self._store("voices", data.get("voices", []))
         except Exception:
             pass
 
         # Return generic voices if not available from API
-        return [
-            {"id": "alloy", "name": "Alloy", "language": "en", "gender": "neutral"},
-            {"id": "echo", "name": "Echo", "language": "en", "gender": "male"},
-            {"id": "fable", "name": "Fable", "language": "en", "gender": "female"},
-            {"id": "onyx", "name": "Onyx", "language": "en", "gender": "male"},
-            {"id": "nova", "name": "Nova", "language": "en", "gender": "female"},
-            {"id": "shimmer", "name": "Shimmer", "language": "en", "gender": "female"},
-        ]
+        return self.DEFAULT_VOICES
 
     async def health_check(self) -> bool:
         """Check if the TTS provider is available."""
@@ -153,17 +167,16 @@ class OpenAICompatProvider(BaseTTSProvider):
             if api_key:
                 headers["Authorization"] = f"Bearer {api_key}"
 
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                # Try health endpoint first
-                response = await client.get(f"{self.base_url}/health", headers=headers)
-                if response.status_code == 200:
-                    return True
-                # Try voices endpoint
-                response = await client.get(f"{self.base_url}/v1/audio/voices", headers=headers)
-                if response.status_code == 200:
-                    return True
-                # Try models endpoint (common in OpenAI-compatible APIs)
-                response = await client.get(f"{self.base_url}/v1/models", headers=headers)
-                return response.status_code == 200
+            # Probe every known endpoint at once; any 200 means the server is up
+            healthy = await self._probe(
+                [
+                    ("/health", ok_status),
+                    ("/v1/audio/voices", ok_status),
+                    ("/v1/models", ok_status),  # Common in OpenAI-compatible APIs
+                ],
+                timeout=5.0,
+                headers=headers,
+            )
+            return bool(healthy)
         except Exception:
             return False
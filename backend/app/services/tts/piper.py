@@ -1,16 +1,23 @@
 """Piper TTS provider implementation."""
 
-import httpx
-import aiofiles
 from typing import Optional, AsyncGenerator
-from urllib.parse import urlencode
 
-from app.services.tts.base import BaseTTSProvider
+from app.services.tts.base import BaseTTSProvider, VOICES_CACHE_TTL, ok_status
 
 
 class PiperProvider(BaseTTSProvider):
     """Piper TTS provider (CPU-based, no streaming, port 5000)."""
 
+    # Voices offered when the server can't list its own
+    DEFAULT_VOICES = [
+        {"id": "en_US-lessac-medium", "name": "Lessac (US English)", "language": "en-US", "gender": "female"},
+        {"id": "en_US-amy-medium", "name": "Amy (US English)", "language": "en-US", "gender": "female"},
+        {"id": "en_US-danny-low", "name": "Danny (US English)", "language": "en-US", "gender": "male"},
+        {"id": "en_US-ryan-medium", "name": "Ryan (US English)", "language": "en-US", "gender": "male"},
+        {"id": "en_GB-alan-medium", "name": "Alan (British English)", "language": "en-GB", "gender": "male"},
+        {"id": "en_GB-alba-medium", "name": "Alba (British English)", "language": "en-GB", "gender": "female"},
+    ]
+
     @property
     def provider_type(self) -> str:
         return "piper"
@@ -46,23 +53,23 @@ class PiperProvider(BaseTTSProvider):
         if self.settings.get("noise_scale"):
             params["noise_scale"] = self.settings["noise_scale"]
 
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            response = await client.get(
-                f"{self.base_url}/api/tts",
-                params=params,
-            )
-            response.raise_for_status()
-
-            # Piper returns WAV audio
-            filename, filepath = self._generate_filename("wav")
+        # Piper returns WAV audio
+        filename, filepath = self._generate_filename("wav")
 
-            async with aiofiles.open(filepath, "wb") as f:
-                await f.write(response.content)
+        # Stream the audio straight to file
+        client = self._get_client()
+        async with client.stream(
+            "GET",
+            f"{self.base_url}/api/tts",
+            params=params,
+        ) as response:
+            response.raise_for_status()
+            await self._write_stream(response, filepath)
 
-            return {
-                "audio_url": f"/audio/{filename}",
-                "filename": filename,
-            }
+        return {
+            "audio_url": f"/audio/{filename}",
+            "filename": filename,
+        }
 
     async def generate_stream(
         self,
@@ -76,45 +83,44 @@ class PiperProvider(BaseTTSProvider):
 
     async def list_voices(self) -> list[dict]:
         """List available Piper TTS voices."""
+        cached = self._cached("voices", VOICES_CACHE_TTL)
+        if cached is not None:
+            return cached
+
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                # Piper HTTP server typically exposes voices at /api/voices
-                response = await client.get(f"{self.base_url}/api/voices")
-                if response.status_code == 200:
-                    data = response.json()
-                    # Normalize voice format
-                    voices = []
-                    for voice_id, voice_info in data.items():
-                        voices.append({
-                            "id": voice_id,
-                            "name": voice_info.get("name", voice_id),
-                            "language": voice_info.get("language", {}).get("code", "en"),
-                            "gender": voice_info.get("gender", "unknown"),
-                        })
-                    return voices
+            client = self._get_client()
+            # Piper HTTP server typically exposes voices at /api/voices
+            response = await client.get(f"{self.base_url}/api/voices", timeout=10.0)
+            if response.status_code == 200:
+                data = response.json()
+                # Normalize voice format
+                voices = []
+                for voice_id, voice_info in data.items():
+                    voices.append({
+                        "id": voice_id,
+                        "name": voice_info.get("name", voice_id),
+                        "language": voice_info.get("language", {}).get("code", "en"),
+                        "gender": voice_info.get("gender", "unknown"),
+                    })
+                return self._store("voices", voices)
         except Exception:
             pass
 
         # Return common Piper voices as fallback
-        return [
-            {"id": "en_US-lessac-medium", "name": "Lessac (US English)", "language": "en-US", "gender": "female"},
-            {"id": "en_US-amy-medium", "name": "Amy (US English)", "language": "en-US", "gender": "female"},
-            {"id": "en_US-danny-low", "name": "Danny (US English)", "language": "en-US", "gender": "male"},
-            {"id": "en_US-ryan-medium", "name": "Ryan (US English)", "language": "en-US", "gender": "male"},
-            {"id": "en_GB-alan-medium", "name": "Alan (British English)", "language": "en-GB", "gender": "male"},
-            {"id": "en_GB-alba-medium", "name": "Alba (British English)", "language": "en-GB", "gender": "female"},
-        ]
+        return self.DEFAULT_VOICES
 
     async def health_check(self) -> bool:
         """Check if Piper TTS is available."""
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                # Try voices endpoint
-                response = await client.get(f"{self.base_url}/api/voices")
-                if response.status_code == 200:
-                    return True
-                # Fallback to simple request
-                response = await client.get(f"{self.base_url}/")
-                return response.status_code < 500
+            # Probe the voices endpoint and the root at once; the root only
+            # needs to answer without a server error
+            healthy = await self._probe(
+                [
+                    ("/api/voices", ok_status),
+                    ("/", lambda response: response.status_code < 500),
+                ],
+                timeout=5.0,
+            )
+            return bool(healthy)
         except Exception:
             return False
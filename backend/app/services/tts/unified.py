@@ -1,5 +1,8 @@
 """Unified TTS service that routes to appropriate providers."""
 
+import asyncio
+from collections import OrderedDict
+from contextlib import aclosing
 from typing import Optional, AsyncGenerator
 from sqlalchemy.orm import Session
 
@@ -28,22 +31,28 @@ class UnifiedTTSService:
         TTSProviderType.CHATTERBOX: ChatterboxProvider,
     }
 
+    # Most provider instances kept alive at once
+    MAX_CACHED_PROVIDERS = 32
+
     def __init__(self):
-        # Cache for provider instances
-        self._provider_cache: dict[int, BaseTTSProvider] = {}
+        # Cache for provider instances, least recently used first
+        self._provider_cache: OrderedDict[tuple[int, str], BaseTTSProvider] = OrderedDict()
+        # Background closes of instances dropped from the cache
+        self._closing: set[asyncio.Task] = set()
 
         # Fallback settings when no database provider is configured
         self._fallback_base_url = settings.kokoro_tts_url
         self._fallback_voice = settings.tts_default_voice
+        self._fallback_provider: Optional[BaseTTSProvider] = None
 
     def _get_provider_instance(self, provider: TTSProvider) -> BaseTTSProvider:
         """Get or create a provider instance from database model."""
-        # Check cache first
-        if provider.id in self._provider_cache:
-            cached = self._provider_cache[provider.id]
-            # Verify cache is still valid (same URL)
-            if cached.base_url == provider.base_url.rstrip("/"):
-                return cached
+        # Check cache first; a changed URL misses and gets a fresh instance
+        key = (provider.id, provider.base_url.rstrip("/"))
+        cached = self._provider_cache.get(key)
+        if cached is not None:
+            self._provider_cache.move_to_end(key)
+            return cached
 
         # Create new provider instance
         provider_class = self.PROVIDER_CLASSES.get(provider.provider_type)
@@ -56,23 +65,56 @@ class UnifiedTTSService:
             settings=provider.provider_settings or {},
         )
 
-        # Cache the instance
-        self._provider_cache[provider.id] = instance
+        # Cache the instance, replacing any for this provider's previous URL
+        for stale_key in [k for k in self._provider_cache if k[0] == provider.id]:
+            self._close_in_background(self._provider_cache.pop(stale_key))
+        self._provider_cache[key] = instance
+        if len(self._provider_cache) > self.MAX_CACHED_PROVIDERS:
+            _, evicted = self._provider_cache.popitem(last=False)
+            self._close_in_background(evicted)
         return instance
 
+    def _close_in_background(self, instance: BaseTTSProvider) -> None:
+        """Close a dropped instance's HTTP client once its in-flight requests finish."""
+        task = asyncio.get_running_loop().create_task(instance.aclose_when_idle())
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
     def _get_fallback_provider(self) -> BaseTTSProvider:
         """Get fallback Kokoro provider from config settings."""
-        return KokoroProvider(
-            base_url=self._fallback_base_url,
-            default_voice=self._fallback_voice,
-        )
-
-    def clear_cache(self, provider_id: Optional[int] = None):
-        """Clear provider instance cache."""
+        # Keep one instance so its HTTP client and caches are reused
+        if self._fallback_provider is None:
+            self._fallback_provider = KokoroProvider(
+                base_url=self._fallback_base_url,
+                default_voice=self._fallback_voice,
+            )
+        return self._fallback_provider
+
+    async def aclose(self):
+        """Close the shared HTTP clients of cached provider instances."""
+        for instance in self._provider_cache.values():
+            await instance.aclose()
+        if self._fallback_provider is not None:
+            await self._fallback_provider.aclose()
+        # Let closes started for dropped instances finish too
+        await asyncio.gather(*self._closing, return_exceptions=True)
+
+    def invalidate_cache(self, provider: TTSProvider):
+        """Drop a provider's cached health and voice results."""
+        self._get_provider_instance(provider).invalidate_cache()
+
+    async def clear_cache(self, provider_id: Optional[int] = None):
+        """Clear provider instance cache.
+
+        Removed instances close their HTTP clients once requests already
+        running on them have finished.
+        """
         if provider_id:
-            self._provider_cache.pop(provider_id, None)
+            keys = [key for key in self._provider_cache if key[0] == provider_id]
         else:
-            self._provider_cache.clear()
+            keys = list(self._provider_cache)
+        for key in keys:
+            await self._provider_cache.pop(key).aclose_when_idle()
 
     async def generate_audio(
         self,
@@ -106,7 +148,7 @@ class UnifiedTTSService:
         if voice_clone and tts_provider.supports_voice_cloning:
             voice_clone_path = voice_clone.reference_audio_path
 
-        result = await tts_provider.generate_audio(
+        result = await tts_provider.generate_audio_shared(
             text=text,
             voice=voice,
             speed=speed,
@@ -153,13 +195,15 @@ class UnifiedTTSService:
         if voice_clone and tts_provider.supports_voice_cloning:
             voice_clone_path = voice_clone.reference_audio_path
 
-        async for chunk in tts_provider.generate_stream(
+        # Close the provider stream (and its upstream request) as soon as we stop
+        async with tts_provider.in_use(), aclosing(tts_provider.generate_stream(
             text=text,
             voice=voice,
             speed=speed,
             voice_clone_path=voice_clone_path,
-        ):
-            yield chunk
+        )) as chunks:
+            async for chunk in chunks:
+                yield chunk
 
     async def list_voices(
         self,
@@ -171,12 +215,12 @@ class UnifiedTTSService:
         else:
             tts_provider = self._get_fallback_provider()
 
-        voices = await tts_provider.list_voices()
+        async with tts_provider.in_use():
+            voices = await tts_provider.list_voices()
 
-        # Add provider info to each voice
+        # Add provider info to each voice, leaving the provider's cached dicts untouched
         if provider:
-            for voice in voices:
-                voice["provider_id"] = provider.id
+            voices = [{**voice, "provider_id": provider.id} for voice in voices]
 
         return voices
 
@@ -191,39 +235,43 @@ class UnifiedTTSService:
             else:
                 tts_provider = self._get_fallback_provider()
 
-            return await tts_provider.health_check()
+            async with tts_provider.in_use():
+                return await tts_provider.health_check()
         except Exception:
             return False
 
     async def health_check_all(self, db: Session) -> list[dict]:
         """Check health of all configured providers."""
         providers = TTSProviderManager.get_all_providers(db, enabled_only=False)
-        results = []
+        # Check every provider at once so the wait is bounded by the slowest one
+        return list(await asyncio.gather(
+            *(self._provider_health(provider) for provider in providers)
+        ))
 
-        for provider in providers:
-            try:
-                tts_provider = self._get_provider_instance(provider)
+    async def _provider_health(self, provider: TTSProvider) -> dict:
+        """Check one provider's health and describe it for health_check_all."""
+        try:
+            tts_provider = self._get_provider_instance(provider)
+            async with tts_provider.in_use():
                 is_healthy = await tts_provider.health_check()
-                results.append({
-                    "provider_id": provider.id,
-                    "name": provider.name,
-                    "provider_type": provider.provider_type.value,
-                    "status": "ok" if is_healthy else "error",
-                    "enabled": provider.enabled,
-                    "is_default": provider.is_default,
-                })
-            except Exception as e:
-                results.append({
-                    "provider_id": provider.id,
-                    "name": provider.name,
-                    "provider_type": provider.provider_type.value,
-                    "status": "error",
-                    "message": str(e),
-                    "enabled": provider.enabled,
-                    "is_default": provider.is_default,
-                })
-
-        return results
+            return {
+                "provider_id": provider.id,
+                "name": provider.name,
+                "provider_type": provider.provider_type.value,
+                "status": "ok" if is_healthy else "error",
+                "enabled": provider.enabled,
+                "is_default": provider.is_default,
+            }
+        except Exception as e:
+            return {
+                "provider_id": provider.id,
+                "name": provider.name,
+                "provider_type": provider.provider_type.value,
+                "status": "error",
+                "message": str(e),
+                "enabled": provider.enabled,
+                "is_default": provider.is_default,
+            }
 
     def get_provider_capabilities(self, provider: TTSProvider) -> dict:
         """Get capabilities of a provider."""
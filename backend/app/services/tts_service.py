@@ -1,9 +1,19 @@
+import asyncio
+import hashlib
+import os
+import time
 import httpx
 import uuid
 import aiofiles
 from pathlib import Path
 from typing import Optional
 from app.config import get_settings
+from app.services.tts.base import (
+    CLIENT_LIMITS,
+    DOWNLOAD_CHUNK_SIZE,
+    HEALTH_CACHE_TTL,
+    VOICES_CACHE_TTL,
+)
 
 settings = get_settings()
 
@@ -11,11 +21,40 @@ settings = get_settings()
 class TTSService:
     """Service for interacting with Kokoro TTS (OpenAI-compatible API)."""
 
+    # Voices offered when the server can't list its own
+    DEFAULT_VOICES = [
+        {"id": "af_bella", "name": "Bella (American Female)", "language": "en-US", "gender": "female"},
+        {"id": "af_sarah", "name": "Sarah (American Female)", "language": "en-US", "gender": "female"},
+        {"id": "am_adam", "name": "Adam (American Male)", "language": "en-US", "gender": "male"},
+        {"id": "am_michael", "name": "Michael (American Male)", "language": "en-US", "gender": "male"},
+        {"id": "bf_emma", "name": "Emma (British Female)", "language": "en-GB", "gender": "female"},
+        {"id": "bm_george", "name": "George (British Male)", "language": "en-GB", "gender": "male"},
+    ]
+
     def __init__(self):
         self.base_url = settings.kokoro_tts_url
         self.default_voice = settings.tts_default_voice
         self.audio_dir = Path("./data/audio")
         self.audio_dir.mkdir(parents=True, exist_ok=True)
+        self._client: Optional[httpx.AsyncClient] = None
+        # In-flight generations by cache key
+        self._inflight: dict[str, asyncio.Task] = {}
+        # Last successful voice listing: (monotonic time fetched, voices)
+        self._voices_cache: Optional[tuple[float, list[dict]]] = None
+        # Monotonic time of the last successful health check
+        self._healthy_at: Optional[float] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Get the shared HTTP client, creating it on first use."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(timeout=120.0, limits=CLIENT_LIMITS)
+        return self._client
+
+    async def aclose(self):
+        """Close the shared HTTP client."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
     async def generate_audio(
         self,
@@ -23,9 +62,39 @@ class TTSService:
         voice: Optional[str] = None,
         speed: float = 1.0,
     ) -> dict:
-        """Generate audio from text using Kokoro TTS."""
+        """Generate audio from text using Kokoro TTS.
+
+        Audio is stored under a name derived from (text, voice, speed), so
+        repeating a request returns the existing file without calling Kokoro.
+        Identical requests that arrive while one is running share its result.
+        """
         voice = voice or self.default_voice
 
+        key = self._cache_key(text, voice, speed)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._generate(text, voice, speed, key))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish_inflight(key, done))
+        # Shield so one caller disconnecting doesn't cancel the others
+        return dict(await asyncio.shield(task))
+
+    def _finish_inflight(self, key: str, task: asyncio.Task) -> None:
+        """Forget a finished generation, retrieving its error if nobody did."""
+        self._inflight.pop(key, None)
+        if not task.cancelled():
+            task.exception()
+
+    async def _generate(self, text: str, voice: str, speed: float, key: str) -> dict:
+        """Return the cached audio for a request, synthesizing it if missing."""
+        filename = f"{key}.mp3"
+        filepath = self.audio_dir / filename
+        if await asyncio.to_thread(filepath.exists):
+            return {
+                "audio_url": f"/audio/{filename}",
+                "filename": filename,
+            }
+
         payload = {
             "model": "kokoro",
             "input": text,
@@ -34,54 +103,76 @@ class TTSService:
             "response_format": "mp3",
         }
 
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            response = await client.post(
+        # Stream audio to a temporary name and move it into place, so a
+        # half-written file is never served as a cache hit
+        tmp_path = self.audio_dir / f"{filename}.{uuid.uuid4().hex}.tmp"
+        client = self._get_client()
+        try:
+            async with client.stream(
+                "POST",
                 f"{self.base_url}/v1/audio/speech",
                 json=payload,
-            )
-            response.raise_for_status()
-
-            # Save audio to file
-            filename = f"{uuid.uuid4()}.mp3"
-            filepath = self.audio_dir / filename
+            ) as response:
+                response.raise_for_status()
+                async with aiofiles.open(tmp_path, "wb") as f:
+                    async for chunk in response.aiter_bytes(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                        await f.write(chunk)
+            await asyncio.to_thread(os.replace, tmp_path, filepath)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
 
-            async with aiofiles.open(filepath, "wb") as f:
-                await f.write(response.content)
+        return {
+            "audio_url": f"/audio/{filename}",
+            "filename": filename,
+        }
 
-            return {
-                "audio_url": f"/audio/{filename}",
-                "filename": filename,
-            }
+    @staticmethod
+    def _cache_key(text: str, voice: str, speed: float) -> str:
+        """Return the cache key for a synthesis request."""
+        return hashlib.blake2b(
+            f"{voice}|{speed}|{text}".encode(), digest_size=16
+        ).hexdigest()
 
     async def list_voices(self) -> list[dict]:
         """List available TTS voices."""
+        if self._voices_cache and time.monotonic() - self._voices_cache[0] < VOICES_CACHE_TTL:
+            return self._voices_cache[1]
+
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(f"{self.base_url}/v1/audio/voices")
-                if response.status_code == 200:
-                    data = response.json()
-                    return data.get("voices", [])
+            response = await self._get_client().get(
+                f"{self.base_url}/v1/audio/voices", timeout=10.0
+            )
+            if response.status_code == 200:
+                data = response.json()
+                voices = data.get("voices", [])
+                self._voices_cache = (time.monotonic(), voices)
+                return voices
         except Exception:
             pass
 
+        # Prefer the last listing we got over the defaults
+        if self._voices_cache:
+            return self._voices_cache[1]
+
         # Return default voices if API not available
-        return [
-            {"id": "af_bella", "name": "Bella (American Female)", "language": "en-US", "gender": "female"},
-            {"id": "af_sarah", "name": "Sarah (American Female)", "language": "en-US", "gender": "female"},
-            {"id": "am_adam", "name": "Adam (American Male)", "language": "en-US", "gender": "male"},
-            {"id": "am_michael", "name": "Michael (American Male)", "language": "en-US", "gender": "male"},
-            {"id": "bf_emma", "name": "Emma (British Female)", "language": "en-GB", "gender": "female"},
-            {"id": "bm_george", "name": "George (British Male)", "language": "en-GB", "gender": "male"},
-        ]
+        return self.DEFAULT_VOICES
 
     async def health_check(self) -> bool:
         """Check if Kokoro TTS is available."""
+        # Reuse a recent successful check; failures are re-probed every time
+        if self._healthy_at is not None and time.monotonic() - self._healthy_at < HEALTH_CACHE_TTL:
+            return True
+
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                response = await client.get(f"{self.base_url}/health")
-                return response.status_code == 200
+            response = await self._get_client().get(
+                f"{self.base_url}/health", timeout=5.0
+            )
+            healthy = response.status_code == 200
         except Exception:
-            return False
+            healthy = False
+        self._healthy_at = time.monotonic() if healthy else None
+        return healthy
 
 
 # Singleton instance
@@ -37,14 +37,18 @@ def db():
     Base.metadata.drop_all(bind=engine)
 
 
-@pytest.fixture(scope="function")
-def client(db):
-    """Create a test client with the test database."""
+@pytest.fixture(scope="session")
+def app_client():
+    """Start the app once and share its test client across the session."""
     app.dependency_overrides[get_db] = override_get_db
-    Base.metadata.create_all(bind=engine)
 
     with TestClient(app) as test_client:
         yield test_client
 
-    Base.metadata.drop_all(bind=engine)
     app.dependency_overrides.clear()
+
+
+@pytest.fixture(scope="function")
+def client(app_client, db):
+    """Create a test client with a fresh test database."""
+    yield app_client
@@ -1,6 +1,3 @@
-import pytest
-
-
 def test_create_story(client):
     """Test creating a new story."""
     # First create a scenario
@@ -153,3 +150,123 @@ def test_delete_story(client):
 
     get_response = client.get(f"/api/stories/{story_id}")
     assert get_response.status_code == 404
+
+
+def test_fork_story(client, db):
+    """Test forking a story copies characters, episodes and memory up to the fork point."""
+    from app.models import Episode, MemoryState
+
+    # Create scenario, character and story
+    scenario_response = client.post(
+        "/api/scenarios",
+        json={"name": "Test Scenario"},
+    )
+    scenario_id = scenario_response.json()["id"]
+    character_response = client.post(
+        "/api/characters",
+        json={"name": "Hero"},
+    )
+    character_id = character_response.json()["id"]
+    create_response = client.post(
+        "/api/stories",
+        json={
+            "title": "Original",
+            "scenario_id": scenario_id,
+            "characters": [{"character_id": character_id, "role": "protagonist"}],
+        },
+    )
+    story_id = create_response.json()["id"]
+
+    # Add episodes with a memory state at each one
+    for number in range(1, 4):
+        episode = Episode(
+            story_id=story_id,
+            number=number,
+            title=f"Episode {number}",
+            content=f"Content {number}.",
+            word_count=2,
+        )
+        db.add(episode)
+        db.commit()
+        db.add(MemoryState(
+            story_id=story_id,
+            episode_id=episode.id,
+            active_memory=f"Memory {number}",
+            character_states=[{"name": "Hero"}],
+        ))
+        db.commit()
+
+    response = client.post(
+        f"/api/stories/{story_id}/fork",
+        json={"from_episode": 2, "new_title": "Forked"},
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["title"] == "Forked"
+    assert data["parent_story_id"] == story_id
+    assert data["fork_from_episode"] == 2
+    assert data["episode_count"] == 2
+    assert data["characters"][0]["character_id"] == character_id
+    assert data["characters"][0]["role"] == "protagonist"
+
+    episodes_response = client.get(f"/api/stories/{data['id']}/episodes")
+    episodes = episodes_response.json()["episodes"]
+    assert [ep["title"] for ep in episodes] == ["Episode 1", "Episode 2"]
+
+    fork_memory = db.query(MemoryState).filter(MemoryState.story_id == data["id"]).one()
+    assert fork_memory.episode_id == episodes[-1]["id"]
+    assert fork_memory.active_memory == "Memory 2"
+    assert fork_memory.character_states == [{"name": "Hero"}]
+
+
+def test_get_story_tree(client, db):
+    """Test the fork tree is built from the root for any story in it."""
+    from app.models import Episode
+
+    scenario_response = client.post(
+        "/api/scenarios",
+        json={"name": "Test Scenario"},
+    )
+    scenario_id = scenario_response.json()["id"]
+    create_response = client.post(
+        "/api/stories",
+        json={"title": "Root", "scenario_id": scenario_id, "characters": []},
+    )
+    root_id = create_response.json()["id"]
+    for number in range(1, 4):
+        db.add(Episode(story_id=root_id, number=number, content=f"Content {number}."))
+    db.commit()
+
+    fork_response = client.post(
+        f"/api/stories/{root_id}/fork",
+        json={"from_episode": 2, "new_title": "Fork"},
+    )
+    fork_id = fork_response.json()["id"]
+    nested_response = client.post(
+        f"/api/stories/{fork_id}/fork",
+        json={"from_episode": 1, "new_title": "Nested Fork"},
+    )
+    nested_id = nested_response.json()["id"]
+    sibling_response = client.post(
+        f"/api/stories/{root_id}/fork",
+        json={"from_episode": 3, "new_title": "Sibling"},
+    )
+    sibling_id = sibling_response.json()["id"]
+
+    response = client.get(f"/api/stories/{nested_id}/tree")
+    assert response.status_code == 200
+    root = response.json()["root"]
+    assert root["id"] == root_id
+    assert root["episode_count"] == 3
+    assert [child["id"] for child in root["children"]] == [fork_id, sibling_id]
+
+    fork, sibling = root["children"]
+    assert fork["episode_count"] == 2
+    assert fork["fork_from_episode"] == 2
+    assert sibling["episode_count"] == 3
+    assert sibling["children"] == []
+    assert fork["children"][0]["id"] == nested_id
+    assert fork["children"][0]["episode_count"] == 1
+
+    missing_response = client.get("/api/stories/99999/tree")
+    assert missing_response.status_code == 404
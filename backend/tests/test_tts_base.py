@@ -0,0 +1,137 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.services.tts.base import coalesce_chunks
+from app.services.tts.kokoro import KokoroProvider
+
+
+@pytest.fixture
+def provider(tmp_path, monkeypatch):
+    """Create a Kokoro provider writing audio under a temporary directory."""
+    monkeypatch.chdir(tmp_path)
+    return KokoroProvider(base_url="http://tts.test")
+
+
+def use_handler(provider, handler):
+    """Route the provider's HTTP client through a mock transport."""
+    provider._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def accept_path(response):
+    """Probe parser returning the path of a 200 response, else None."""
+    return response.request.url.path if response.status_code == 200 else None
+
+
+class FailingStream(httpx.AsyncByteStream):
+    """Response body that breaks off after its first chunk."""
+
+    async def __aiter__(self):
+        yield b"partial audio"
+        raise httpx.ReadError("connection lost")
+
+
+@pytest.mark.asyncio
+async def test_identical_concurrent_generations_share_one_request(provider):
+    """Test that identical concurrent calls make a single upstream request."""
+    requests = []
+
+    async def handler(request):
+        requests.append(request)
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, content=b"mp3 data")
+
+    use_handler(provider, handler)
+    results = await asyncio.gather(
+        *(provider.generate_audio_shared("Hello", voice="af_bella") for _ in range(5))
+    )
+
+    assert len(requests) == 1
+    assert all(result == results[0] for result in results)
+    # Each caller gets its own dict to annotate
+    assert results[0] is not results[1]
+    assert provider._inflight == {}
+
+
+@pytest.mark.asyncio
+async def test_failed_download_leaves_no_file(provider):
+    """Test that a download failing mid-stream removes the partial file."""
+    use_handler(provider, lambda request: httpx.Response(200, stream=FailingStream()))
+
+    with pytest.raises(httpx.ReadError):
+        await provider.generate_audio("Hello")
+
+    assert list(provider.audio_dir.iterdir()) == []
+
+
+@pytest.mark.asyncio
+async def test_probe_prefers_list_order_and_cancels_the_rest(provider):
+    """Test that probes resolve in list order and unfinished ones are cancelled."""
+    cancelled = []
+
+    async def handler(request):
+        if request.url.path == "/slow":
+            await asyncio.sleep(0.02)
+            return httpx.Response(200)
+        if request.url.path == "/hang":
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(request.url.path)
+                raise
+        return httpx.Response(200)
+
+    use_handler(provider, handler)
+    result = await provider._probe(
+        [("/slow", accept_path), ("/fast", accept_path), ("/hang", accept_path)],
+        timeout=5.0,
+    )
+    await asyncio.sleep(0)
+
+    # /fast answers first, but the earlier /slow probe still wins
+    assert result == "/slow"
+    assert cancelled == ["/hang"]
+
+
+@pytest.mark.asyncio
+async def test_probe_falls_through_rejected_results(provider):
+    """Test that a probe parsed as None falls through to the next one."""
+    use_handler(
+        provider,
+        lambda request: httpx.Response(404 if request.url.path == "/first" else 200),
+    )
+
+    result = await provider._probe([("/first", accept_path), ("/second", accept_path)], timeout=5.0)
+
+    assert result == "/second"
+
+
+async def collect(chunks, **kwargs):
+    """Gather everything coalesce_chunks yields."""
+    return [chunk async for chunk in coalesce_chunks(chunks, **kwargs)]
+
+
+@pytest.mark.asyncio
+async def test_coalesce_merges_until_min_size():
+    """Test that fast small chunks are merged up to the size threshold."""
+    async def source():
+        for _ in range(5):
+            yield b"abcd"
+
+    chunks = await collect(source(), min_size=10, flush_delay=1.0)
+
+    assert chunks == [b"abcd" * 3, b"abcd" * 2]
+
+
+@pytest.mark.asyncio
+async def test_coalesce_flushes_when_source_is_idle():
+    """Test that buffered data is sent when the source goes quiet."""
+    async def source():
+        yield b"ab"
+        await asyncio.sleep(0.1)
+        yield b"cd"
+
+    chunks = await collect(source(), min_size=1024, flush_delay=0.01)
+
+    assert chunks == [b"ab", b"cd"]
@@ -0,0 +1,42 @@
+import json
+
+import httpx
+import pytest
+
+from app.services.tts.chatterbox import ChatterboxProvider
+
+
+@pytest.mark.asyncio
+async def test_clone_reuploads_reference_after_client_error(tmp_path, monkeypatch):
+    """Test that a remembered reference is re-uploaded when the server rejects it."""
+    monkeypatch.chdir(tmp_path)
+    reference = tmp_path / "narrator.wav"
+    reference.write_bytes(b"RIFF reference audio")
+
+    uploads = []
+    tts_references = []
+    lost = set()
+
+    def handler(request):
+        if request.url.path == "/upload_reference":
+            uploads.append(request)
+            return httpx.Response(200, json={"filename": f"ref{len(uploads)}.wav"})
+        if request.url.path == "/tts":
+            filename = json.loads(request.content)["reference_audio_filename"]
+            tts_references.append(filename)
+            if filename in lost:
+                return httpx.Response(400, json={"detail": "Reference not found"})
+            return httpx.Response(200, content=b"wav data")
+        return httpx.Response(404)
+
+    provider = ChatterboxProvider(base_url="http://chatterbox.test")
+    provider._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    await provider.generate_audio("One", voice_clone_path=str(reference))
+    # Simulate the server forgetting the upload, e.g. after a restart
+    lost.add("ref1.wav")
+    await provider.generate_audio("Two", voice_clone_path=str(reference))
+    await provider.generate_audio("Three", voice_clone_path=str(reference))
+
+    assert len(uploads) == 2
+    assert tts_references == ["ref1.wav", "ref1.wav", "ref2.wav", "ref2.wav"]
@@ -0,0 +1,116 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.services.tts_service import TTSService
+
+
+class FailingStream(httpx.AsyncByteStream):
+    """Response body that breaks off after its first chunk."""
+
+    async def __aiter__(self):
+        yield b"partial audio"
+        raise httpx.ReadError("connection lost")
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    """Create a TTSService writing audio under a temporary directory."""
+    monkeypatch.chdir(tmp_path)
+    return TTSService()
+
+
+def use_handler(service, handler):
+    """Route the service's HTTP client through a mock transport."""
+    service._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+@pytest.mark.asyncio
+async def test_generate_audio_reuses_cached_file(service):
+    """Test that repeating a request returns the stored file without synthesizing."""
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, content=b"mp3 data")
+
+    use_handler(service, handler)
+    first = await service.generate_audio("Hello", voice="af_bella")
+    second = await service.generate_audio("Hello", voice="af_bella")
+    other = await service.generate_audio("Hello", voice="af_bella", speed=1.5)
+
+    assert first == second
+    assert other["filename"] != first["filename"]
+    assert len(requests) == 2
+    # Only the finished files remain; temporary names were moved into place
+    assert sorted(p.name for p in service.audio_dir.iterdir()) == sorted(
+        [first["filename"], other["filename"]]
+    )
+    assert (service.audio_dir / first["filename"]).read_bytes() == b"mp3 data"
+
+
+@pytest.mark.asyncio
+async def test_failed_generation_leaves_no_file(service):
+    """Test that a failed download leaves neither a cache entry nor a temp file."""
+    use_handler(service, lambda request: httpx.Response(200, stream=FailingStream()))
+
+    with pytest.raises(httpx.ReadError):
+        await service.generate_audio("Hello")
+
+    assert list(service.audio_dir.iterdir()) == []
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_generations_share_one_request(service):
+    """Test that identical concurrent calls make a single upstream request."""
+    requests = []
+
+    async def handler(request):
+        requests.append(request)
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, content=b"mp3 data")
+
+    use_handler(service, handler)
+    results = await asyncio.gather(*(service.generate_audio("Hello") for _ in range(5)))
+
+    assert len(requests) == 1
+    assert all(result == results[0] for result in results)
+    assert service._inflight == {}
+
+
+@pytest.mark.asyncio
+async def test_list_voices_is_cached_and_survives_errors(service):
+    """Test that voices are reused and the last listing outlives a failed refresh."""
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json={"voices": [{"id": "af_bella"}]})
+
+    use_handler(service, handler)
+    assert await service.list_voices() == [{"id": "af_bella"}]
+    assert await service.list_voices() == [{"id": "af_bella"}]
+    assert len(requests) == 1
+
+    # Expire the cache and make the server fail
+    service._voices_cache = (0.0, service._voices_cache[1])
+    use_handler(service, lambda request: httpx.Response(500))
+    assert await service.list_voices() == [{"id": "af_bella"}]
+
+
+@pytest.mark.asyncio
+async def test_health_check_reuses_only_successes(service):
+    """Test that a success is reused while a failure is re-probed."""
+    statuses = [503, 200]
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(statuses.pop(0))
+
+    use_handler(service, handler)
+    assert await service.health_check() is False
+    assert await service.health_check() is True
+    assert await service.health_check() is True
+    assert len(requests) == 2
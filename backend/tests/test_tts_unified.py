@@ -0,0 +1,119 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from app.models.tts_provider import TTSProviderType
+from app.services.tts.unified import UnifiedTTSService
+
+
+def make_provider(provider_id, base_url="http://tts.test"):
+    """Build a stand-in for a TTSProvider row."""
+    return SimpleNamespace(
+        id=provider_id,
+        base_url=base_url,
+        provider_type=TTSProviderType.KOKORO,
+        default_voice=None,
+        provider_settings=None,
+    )
+
+
+async def settle(service):
+    """Wait for background closes of dropped instances."""
+    await asyncio.gather(*service._closing)
+
+
+@pytest.mark.asyncio
+async def test_evicted_provider_client_is_closed():
+    """Test that LRU eviction closes the dropped instance's HTTP client."""
+    service = UnifiedTTSService()
+    service.MAX_CACHED_PROVIDERS = 2
+
+    first = service._get_provider_instance(make_provider(1))
+    client = first._get_client()
+    service._get_provider_instance(make_provider(2))
+    service._get_provider_instance(make_provider(3))
+    await settle(service)
+
+    assert len(service._provider_cache) == 2
+    assert client.is_closed
+    await service.aclose()
+
+
+@pytest.mark.asyncio
+async def test_replaced_provider_client_is_closed():
+    """Test that a provider's old instance is closed when its URL changes."""
+    service = UnifiedTTSService()
+
+    old = service._get_provider_instance(make_provider(1))
+    client = old._get_client()
+    new = service._get_provider_instance(make_provider(1, "http://other.test"))
+    await settle(service)
+
+    assert new is not old
+    assert client.is_closed
+    await service.aclose()
+
+
+@pytest.mark.asyncio
+async def test_clear_cache_closes_clients():
+    """Test that clearing the cache closes only the removed instances' clients."""
+    service = UnifiedTTSService()
+
+    cleared = service._get_provider_instance(make_provider(1))._get_client()
+    kept = service._get_provider_instance(make_provider(2))._get_client()
+    await service.clear_cache(1)
+
+    assert cleared.is_closed
+    assert not kept.is_closed
+
+    await service.clear_cache()
+    assert kept.is_closed
+    assert not service._provider_cache
+
+
+
+def open_stream(service, provider):
+    """Start a stream on a provider whose server sends 100 kB of audio."""
+    instance = service._get_provider_instance(provider)
+    instance._client = httpx.AsyncClient(
+        transport=httpx.MockTransport(
+            lambda request: httpx.Response(200, content=b"x" * 100_000)
+        )
+    )
+    return instance._client, service.generate_stream("Hello", provider=provider)
+
+
+@pytest.mark.asyncio
+async def test_clear_cache_keeps_client_until_stream_finishes():
+    """Test that clearing a busy instance doesn't cut off its stream."""
+    service = UnifiedTTSService()
+    client, stream = open_stream(service, make_provider(1))
+    first = await stream.__anext__()
+
+    await service.clear_cache(1)
+    assert not client.is_closed
+
+    rest = b"".join([chunk async for chunk in stream])
+    assert len(first) + len(rest) == 100_000
+    assert client.is_closed
+
+
+@pytest.mark.asyncio
+async def test_evicted_provider_keeps_client_until_stream_finishes():
+    """Test that evicting or replacing a busy instance doesn't cut off its stream."""
+    service = UnifiedTTSService()
+    service.MAX_CACHED_PROVIDERS = 1
+    client, stream = open_stream(service, make_provider(1))
+    first = await stream.__anext__()
+
+    # Replace the instance with a new URL, then evict that one too
+    service._get_provider_instance(make_provider(1, "http://other.test"))
+    service._get_provider_instance(make_provider(2))
+    await settle(service)
+    assert not client.is_closed
+
+    rest = b"".join([chunk async for chunk in stream])
+    assert len(first) + len(rest) == 100_000
+    assert client.is_closed